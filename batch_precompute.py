@@ -0,0 +1,78 @@
+import os
+os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")
+
+import sys
+import time
+import argparse
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from settings import *
+from svg_handler import SVGHandler
+from fourier_engine import FourierEpicycles
+from epicycle_pack import write_pack, PACK_EXTENSION
+
+# ====== BATCH PRECOMPUTE ======
+def find_svgs(directory, recursive=True):
+    """Liste triée des fichiers .svg du dossier."""
+    found = []
+    for root, dirs, files in os.walk(directory):
+        found.extend(os.path.join(root, f) for f in files if f.lower().endswith(".svg"))
+        if not recursive:
+            break
+    return sorted(found)
+
+def output_path(svg_path, directory, out_dir):
+    rel = os.path.splitext(os.path.relpath(svg_path, directory))[0]
+    base = os.path.join(out_dir, rel) if out_dir else os.path.splitext(svg_path)[0]
+    return base + PACK_EXTENSION
+
+def precompute_file(svg_path, out_path, n_coeffs):
+    """
+    Tâche worker : charge un SVG (sans repli sur le coeur), calcule les coefficients
+    et écrit le pack d'épicycles. Retourne (temps de chargement, temps de transformée, nb de points).
+    """
+    t0 = time.perf_counter()
+    points, total_length, meta = SVGHandler.load_svg(svg_path, strict=True, workers=0, return_meta=True)
+    t1 = time.perf_counter()
+    coeffs = FourierEpicycles.compute_coeffs_static(points, n_coeffs)
+    t2 = time.perf_counter()
+
+    os.makedirs(os.path.dirname(out_path) or ".", exist_ok=True)
+    write_pack(out_path, coeffs, total_length, normalization=meta, source=svg_path)
+    return t1 - t0, t2 - t1, len(points)
+
+def main():
+    parser = argparse.ArgumentParser(description="Précalcule les coefficients de Fourier de tous les SVG d'un dossier.")
+    parser.add_argument("directory", help="Dossier contenant les SVG")
+    parser.add_argument("-o", "--out-dir", default=None, help="Dossier de sortie (défaut : à côté de chaque SVG)")
+    parser.add_argument("--coeffs", type=int, default=N_COEFFS, help="Nombre de fréquences (défaut : N_COEFFS)")
+    parser.add_argument("-j", "--workers", type=int, default=os.cpu_count() or 1, help="Processus en parallèle")
+    parser.add_argument("--no-recursive", action="store_true", help="Ne pas descendre dans les sous-dossiers")
+    args = parser.parse_args()
+
+    svgs = find_svgs(args.directory, recursive=not args.no_recursive)
+    if not svgs:
+        print(f"Aucun SVG trouvé dans {args.directory}")
+        return 1
+
+    t_start = time.perf_counter()
+    failures = 0
+    with ProcessPoolExecutor(max_workers=max(1, args.workers)) as pool:
+        futures = {
+            pool.submit(precompute_file, svg, output_path(svg, args.directory, args.out_dir), args.coeffs): svg
+            for svg in svgs
+        }
+        for future in as_completed(futures):
+            svg = os.path.relpath(futures[future], args.directory)
+            try:
+                t_load, t_fft, n_points = future.result()
+                print(f"OK     {svg}  chargement {t_load:.2f}s  transformée {t_fft:.2f}s  ({n_points} points)")
+            except Exception as e:
+                failures += 1
+                print(f"ÉCHEC  {svg}  {type(e).__name__}: {e}")
+
+    total = time.perf_counter() - t_start
+    print(f"{len(svgs) - failures}/{len(svgs)} fichiers traités en {total:.2f}s ({failures} échec(s))")
+    return 1 if failures else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,257 @@
+import os
+# Rendu mesuré sur le pilote SDL factice (aucun écran nécessaire)
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")
+
+import sys
+import json
+import time
+import platform
+import argparse
+import tempfile
+import statistics
+import pygame
+import numpy as np
+from xml.dom import minidom
+from settings import *
+from svg_handler import SVGHandler, sample_path_strings
+from fourier_engine import FourierEpicycles, SegmentedEpicycles
+
+# ====== SYNTHETIC INPUTS ======
+def svg_many_small_paths(n, rng):
+    """n petits chemins dispersés (export de carte, écriture manuscrite)."""
+    paths = []
+    for _ in range(n):
+        x, y = rng.uniform(0, 2000, 2)
+        dx, dy, qx, qy = rng.uniform(-15, 15, 4)
+        paths.append(f'<path d="M {x:.2f} {y:.2f} l {dx:.2f} {dy:.2f} q {qx:.2f} {qy:.2f} {dx:.2f} {-dy:.2f}"/>')
+    return paths
+
+def svg_one_huge_path(n, rng):
+    """Un seul chemin de n segments droits (tracé continu)."""
+    pts = np.cumsum(rng.normal(0, 8, (n, 2)), axis=0)
+    d = "M 0 0 " + " ".join(f"L {x:.2f} {y:.2f}" for x, y in pts)
+    return [f'<path d="{d}"/>']
+
+def svg_dense_curves(n, rng):
+    """n courbes de Bézier cubiques et arcs enchaînés, fortement courbés."""
+    paths = []
+    for i in range(0, n, 50):
+        x, y = rng.uniform(0, 2000, 2)
+        segs = [f"M {x:.2f} {y:.2f}"]
+        for j in range(min(50, n - i)):
+            c = rng.uniform(-60, 60, 6)
+            if j % 3 == 2:
+                segs.append(f"a {abs(c[0]) + 5:.2f} {abs(c[1]) + 5:.2f} 0 0 1 {c[4]:.2f} {c[5]:.2f}")
+            else:
+                segs.append("c " + " ".join(f"{v:.2f}" for v in c))
+        paths.append(f'<path d="{" ".join(segs)}"/>')
+    return paths
+
+GENERATORS = {
+    "many_small_paths": svg_many_small_paths,
+    "one_huge_path": svg_one_huge_path,
+    "dense_curves": svg_dense_curves,
+}
+
+def write_svg(path, elements):
+    with open(path, "w") as f:
+        f.write('<svg xmlns="http://www.w3.org/2000/svg">\n')
+        f.write("\n".join(elements))
+        f.write("\n</svg>\n")
+
+# ====== TIMING ======
+def measure(func, repeat):
+    """Exécute func `repeat` fois ; retourne min / médiane en secondes et le dernier résultat."""
+    times, result = [], None
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        result = func()
+        times.append(time.perf_counter() - t0)
+    return {"min": min(times), "median": statistics.median(times)}, result
+
+def bench_ingestion(svg_path, repeat):
+    """
+    Parsing XML, échantillonnage, tri et load_svg complet, mesurés séparément.
+    Sans 2-opt et sans pool de processus : mesures indépendantes du nombre de cœurs.
+    """
+    def parse():
+        doc = minidom.parse(svg_path)
+        strings = [p.getAttribute('d') for p in doc.getElementsByTagName('path')]
+        doc.unlink()
+        return strings
+
+    results = {}
+    results["parse"], strings = measure(parse, repeat)
+    results["sample"], sampled = measure(lambda: sample_path_strings(strings)[0], repeat)
+    # Tri seul : plus proche voisin, sans 2-opt
+    results["sort"], _ = measure(lambda: SVGHandler.sort_paths(list(sampled), two_opt_budget=0), repeat)
+    results["load_svg"], (points, total_length) = measure(
+        lambda: SVGHandler.load_svg(svg_path, workers=0, two_opt_budget=0), repeat)
+    results["n_paths"] = len(strings)
+    results["n_points"] = int(len(points))
+    return results, points, total_length
+
+def bench_transform(points, n_coeffs_list, repeat, with_dft):
+    results = {}
+    for n in n_coeffs_list:
+        results[f"fft_n{n}"], _ = measure(lambda: FourierEpicycles.compute_coeffs_static(points, n, backend="fft"), repeat)
+        if with_dft:
+            results[f"dft_n{n}"], _ = measure(lambda: FourierEpicycles.compute_coeffs_static(points, n, backend="dft"), repeat)
+    return results
+
+def bench_physics(points, total_length, coeffs, frames, repeat):
+    """Coût moyen d'une image de physique (sous-pas inclus), direct et avec table de trajectoire."""
+    results = {}
+    for mode, use_table in (("direct", False), ("table", True)):
+        def run():
+            fourier = FourierEpicycles(points, total_length, coeffs)
+            fourier.use_trajectory_table = use_table
+            fourier.trajectory()  # Construction de la table hors mesure par image
+            t0 = time.perf_counter()
+            for _ in range(frames):
+                fourier.step_frame(2.0)
+            return (time.perf_counter() - t0) / frames
+        per_frame = [run() for _ in range(repeat)]
+        results[f"frame_{mode}"] = {"min": min(per_frame), "median": statistics.median(per_frame)}
+    return results
+
+def bench_quality(points, total_length, n_coeffs_list, frames):
+    """
+    Erreur de reconstruction (RMS, unités monde) par budget d'épicycles (2n + 1),
+    transformée classique contre transformée par groupes de traits, et coût d'une image pour chacune.
+    """
+    n_max = max(n_coeffs_list)
+    classic = FourierEpicycles(points, total_length, FourierEpicycles.compute_coeffs_static(points, n_max))
+    segmented = SegmentedEpicycles(points, total_length, SegmentedEpicycles.compute_segments_static(points, n_max))
+    results = {"groups": len(segmented.segments)}
+    for n in n_coeffs_list:
+        entry = {}
+        for name, fourier in (("classic", classic), ("segmented", segmented)):
+            fourier.set_active_count(2 * n + 1)
+            fourier.step_frame(2.0)  # Reconstruction du tracé hors mesure
+            entry[f"rms_{name}"] = fourier.reconstruction_error(points)
+            t0 = time.perf_counter()
+            for _ in range(frames):
+                fourier.step_frame(2.0)
+            per_frame = (time.perf_counter() - t0) / frames
+            entry[f"frame_{name}"] = {"min": per_frame, "median": per_frame}
+        results[f"budget_{2 * n + 1}"] = entry
+    return results
+
+def bench_render(points, total_length, coeffs, frames, repeat):
+    """Coût moyen de FourierEpicycles.draw, caméra fixe et caméra mobile."""
+    surface = pygame.Surface(WINDOW_SIZE)
+    results = {}
+    for mode in ("static", "moving"):
+        def run():
+            fourier = FourierEpicycles(points, total_length, coeffs)
+            for _ in range(frames):
+                fourier.step_frame(2.0)
+            elapsed = 0.0
+            for i in range(frames):
+                fourier.step_frame(2.0)
+                cam = np.array([i * 0.7, i * 0.3]) if mode == "moving" else np.array([0.0, 0.0])
+                surface.fill(BG_COLOR)
+                t0 = time.perf_counter()
+                fourier.draw(surface, cam, 1.0)
+                elapsed += time.perf_counter() - t0
+            return elapsed / frames
+        per_frame = [run() for _ in range(repeat)]
+        results[f"draw_{mode}"] = {"min": min(per_frame), "median": statistics.median(per_frame)}
+    return results
+
+# ====== RUN / COMPARE ======
+def run_suite(sizes, n_coeffs_list, repeat, frames, seed):
+    report = {
+        "meta": {
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "pygame": pygame.version.ver,
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "sizes": sizes,
+            "n_coeffs": n_coeffs_list,
+            "repeat": repeat,
+            "frames": frames,
+            "seed": seed,
+        },
+        "results": {},
+    }
+    with tempfile.TemporaryDirectory() as tmp:
+        for kind, generator in GENERATORS.items():
+            for size in sizes:
+                name = f"{kind}_{size}"
+                print(f"- {name}", file=sys.stderr)
+                svg_path = os.path.join(tmp, name + ".svg")
+                write_svg(svg_path, generator(size, np.random.default_rng(seed)))
+
+                ingestion, points, total_length = bench_ingestion(svg_path, repeat)
+                # La DFT directe n'est mesurée que sur les petites entrées (coût O(N·K))
+                transform = bench_transform(points, n_coeffs_list, repeat, with_dft=len(points) <= 20000)
+                coeffs = FourierEpicycles.compute_coeffs_static(points, max(n_coeffs_list))
+                report["results"][name] = {
+                    "ingestion": ingestion,
+                    "transform": transform,
+                    "physics": bench_physics(points, total_length, coeffs, frames, repeat),
+                    "render": bench_render(points, total_length, coeffs, frames, repeat),
+                    "quality": bench_quality(points, total_length, n_coeffs_list, frames),
+                }
+    return report
+
+def flatten(results, prefix=""):
+    """{"a": {"b": {"median": x}}} -> {"a.b": x}"""
+    flat = {}
+    for key, value in results.items():
+        if isinstance(value, dict):
+            if "median" in value:
+                flat[prefix + key] = value["median"]
+            else:
+                flat.update(flatten(value, prefix + key + "."))
+    return flat
+
+def compare(baseline, current, threshold):
+    """Affiche le ratio courant / référence par mesure ; retourne le nombre de régressions."""
+    old, new = flatten(baseline["results"]), flatten(current["results"])
+    regressions = 0
+    for key in sorted(set(old) & set(new)):
+        ratio = new[key] / old[key] if old[key] > 0 else float("inf")
+        flag = ""
+        if ratio > 1 + threshold:
+            flag = "  << RÉGRESSION"
+            regressions += 1
+        elif ratio < 1 - threshold:
+            flag = "  (plus rapide)"
+        print(f"{key:60s} {old[key] * 1000:10.3f} ms -> {new[key] * 1000:10.3f} ms  x{ratio:5.2f}{flag}")
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmarks reproductibles : ingestion, transformée, physique, rendu.")
+    parser.add_argument("-o", "--output", default="benchmark_results.json", help="Fichier JSON de résultats")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[200, 2000, 10000], help="Tailles des entrées synthétiques")
+    parser.add_argument("--coeffs", type=int, nargs="+", default=[50, 200, N_COEFFS], help="Valeurs de N_COEFFS")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--frames", type=int, default=120, help="Images mesurées pour physique et rendu")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--compare", default=None, help="JSON de référence à comparer")
+    parser.add_argument("--threshold", type=float, default=0.10, help="Écart relatif signalé comme régression")
+    parser.add_argument("--quick", action="store_true", help="Petites tailles, une répétition")
+    args = parser.parse_args()
+
+    if args.quick:
+        args.sizes, args.repeat, args.frames = [200, 1000], 1, 30
+
+    report = run_suite(args.sizes, args.coeffs, args.repeat, args.frames, args.seed)
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"Résultats écrits dans {args.output}", file=sys.stderr)
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        return 1 if compare(baseline, report, args.threshold) else 0
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,104 @@
+import os
+import json
+import hashlib
+import numpy as np
+from settings import *
+
+# ====== COEFFICIENT CACHE ======
+def sampling_params():
+    """
+    Paramètres qui influencent les points produits par SVGHandler.load_svg (utilisés dans la clé).
+    Définis ici pour qu'un chargement depuis le cache n'importe pas la chaîne SVG.
+    """
+    return {
+        "sampling_version": 2,
+        "sampling_density": SAMPLING_DENSITY,
+        "sampling_adaptive": SAMPLING_ADAPTIVE,
+        "sampling_angle_step": SAMPLING_ANGLE_STEP,
+        "sort_allow_reverse": SORT_ALLOW_REVERSE,
+        "sort_two_opt_budget": SORT_TWO_OPT_BUDGET,
+    }
+
+class CoeffCache:
+    """
+    Cache disque des résultats de chargement (points, longueur, coefficients).
+    La clé dépend du contenu du SVG, de n_coeffs et des paramètres d'échantillonnage.
+    Taille limitée avec éviction LRU (date de dernier accès = mtime du fichier).
+    """
+    def __init__(self, directory=COEFF_CACHE_DIR, max_bytes=int(COEFF_CACHE_MAX_MB * 1024 * 1024)):
+        self.directory = directory
+        self.max_bytes = max_bytes
+
+    @staticmethod
+    def make_key(filepath, n_coeffs, params):
+        """Hash du contenu du fichier + paramètres. Retourne None si le fichier est illisible."""
+        h = hashlib.sha256()
+        try:
+            with open(filepath, "rb") as f:
+                for chunk in iter(lambda: f.read(1 << 20), b""):
+                    h.update(chunk)
+        except OSError:
+            return None
+        h.update(json.dumps({"n_coeffs": n_coeffs, **params}, sort_keys=True).encode())
+        return h.hexdigest()
+
+    def _path(self, key):
+        return os.path.join(self.directory, key + ".npz")
+
+    def load(self, key):
+        """Retourne (points, total_length, coeffs) ou None si absent."""
+        path = self._path(key)
+        try:
+            with np.load(path) as data:
+                points = data["points"]
+                total_length = float(data["total_length"])
+                coeffs = coeffs_from_arrays(data["freqs"], data["amps"], data["phases"])
+            os.utime(path)  # Marque l'entrée comme récemment utilisée
+        except (OSError, KeyError, ValueError):
+            return None
+        return points, total_length, coeffs
+
+    def store(self, key, points, total_length, coeffs):
+        os.makedirs(self.directory, exist_ok=True)
+        freqs, amps, phases = coeffs_to_arrays(coeffs)
+        tmp_path = self._path(key) + ".tmp"
+        with open(tmp_path, "wb") as f:
+            np.savez(f, points=np.asarray(points, dtype=np.complex128), total_length=total_length,
+                     freqs=freqs, amps=amps, phases=phases)
+        os.replace(tmp_path, self._path(key))
+        self.evict()
+
+    def _entries(self):
+        if not os.path.isdir(self.directory):
+            return []
+        entries = []
+        for name in os.listdir(self.directory):
+            if name.endswith(".npz"):
+                st = os.stat(os.path.join(self.directory, name))
+                entries.append((st.st_mtime, st.st_size, name))
+        return entries
+
+    def evict(self):
+        """Supprime les entrées les moins récemment utilisées au-delà de max_bytes."""
+        entries = sorted(self._entries())
+        total = sum(size for _, size, _ in entries)
+        for _, size, name in entries:
+            if total <= self.max_bytes:
+                break
+            os.remove(os.path.join(self.directory, name))
+            total -= size
+
+    def clear(self):
+        for _, _, name in self._entries():
+            os.remove(os.path.join(self.directory, name))
+
+def coeffs_to_arrays(coeffs):
+    """Liste de dicts {"freq","amp","phase"} -> trois tableaux NumPy."""
+    freqs = np.array([c["freq"] for c in coeffs], dtype=np.int64)
+    amps = np.array([c["amp"] for c in coeffs], dtype=np.float64)
+    phases = np.array([c["phase"] for c in coeffs], dtype=np.float64)
+    return freqs, amps, phases
+
+def coeffs_from_arrays(freqs, amps, phases):
+    """Trois tableaux NumPy -> liste de dicts, dans le même ordre."""
+    return [{"freq": int(f), "amp": a, "phase": p} for f, a, p in zip(freqs, amps, phases)]
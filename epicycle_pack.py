@@ -0,0 +1,144 @@
+import os
+os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")
+
+import sys
+import json
+import mmap
+import struct
+import argparse
+import numpy as np
+from settings import *
+
+# ====== EPICYCLE PACK ======
+# Fichier binaire précalculé, lisible sans svg.path ni parseur XML.
+# Disposition (petit-boutiste) :
+#   "EPCK" | version (u16) | réservé (u16) | taille de l'en-tête (u32) | en-tête JSON UTF-8
+#   puis les tableaux, chacun aligné sur PACK_ALIGN octets ; l'en-tête donne pour chacun
+#   dtype, nombre d'éléments et position relative au début de la zone de données.
+PACK_MAGIC = b"EPCK"
+PACK_VERSION = 1
+PACK_EXTENSION = ".epk"
+PACK_ALIGN = 64
+_PREFIX = struct.Struct("<4sHHI")
+
+# Tableaux stockés (ordre des coefficients : amplitudes décroissantes)
+_ARRAY_DTYPES = {
+    "freqs": "<i8",
+    "amps": "<f8",
+    "phases": "<f8",
+    "coeff_vec": "<c16",
+}
+
+def _align(n):
+    return (n + PACK_ALIGN - 1) // PACK_ALIGN * PACK_ALIGN
+
+def is_pack(path):
+    """Vrai si le fichier commence par l'en-tête d'un pack (ou porte l'extension .epk)."""
+    if path.lower().endswith(PACK_EXTENSION):
+        return True
+    try:
+        with open(path, "rb") as f:
+            return f.read(len(PACK_MAGIC)) == PACK_MAGIC
+    except OSError:
+        return False
+
+def write_pack(path, coeffs, total_length, normalization=None, source=None):
+    """
+    Écrit un pack à partir de coefficients (liste de dicts {"freq","amp","phase"}, triée
+    par amplitude décroissante). normalization : métadonnées de SVGHandler.load_svg(return_meta=True).
+    """
+    freqs = np.array([c["freq"] for c in coeffs], dtype=np.int64)
+    amps = np.array([c["amp"] for c in coeffs], dtype=np.float64)
+    phases = np.array([c["phase"] for c in coeffs], dtype=np.float64)
+    arrays = {"freqs": freqs, "amps": amps, "phases": phases, "coeff_vec": amps * np.exp(1j * phases)}
+
+    layout, offset = {}, 0
+    for name, dtype in _ARRAY_DTYPES.items():
+        layout[name] = {"dtype": dtype, "count": len(arrays[name]), "offset": offset}
+        offset = _align(offset + arrays[name].astype(dtype).nbytes)
+
+    header = json.dumps({
+        "total_length": float(total_length),
+        "n_coeffs": len(coeffs),
+        "normalization": normalization,
+        "source": os.path.basename(source) if source else None,
+        "arrays": layout,
+    }).encode("utf-8")
+    data_start = _align(_PREFIX.size + len(header))
+
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(_PREFIX.pack(PACK_MAGIC, PACK_VERSION, 0, len(header)))
+        f.write(header)
+        for name, dtype in _ARRAY_DTYPES.items():
+            f.seek(data_start + layout[name]["offset"])
+            f.write(arrays[name].astype(dtype).tobytes())
+        f.truncate(data_start + offset)
+    os.replace(tmp_path, path)
+
+class EpicyclePack:
+    """
+    Pack ouvert en mémoire projetée : les tableaux sont des vues en lecture seule
+    sur le fichier (aucune copie), valides tant que le pack est référencé.
+    """
+    def __init__(self, path):
+        with open(path, "rb") as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if len(self._mmap) < _PREFIX.size:
+            raise ValueError(f"{path} : fichier trop court pour un pack")
+        magic, version, _, header_len = _PREFIX.unpack_from(self._mmap, 0)
+        if magic != PACK_MAGIC:
+            raise ValueError(f"{path} : ce n'est pas un pack d'épicycles")
+        if version > PACK_VERSION:
+            raise ValueError(f"{path} : version de pack {version} non supportée (max {PACK_VERSION})")
+
+        self.header = json.loads(bytes(self._mmap[_PREFIX.size:_PREFIX.size + header_len]).decode("utf-8"))
+        data_start = _align(_PREFIX.size + header_len)
+        self.arrays = {}
+        for name, spec in self.header["arrays"].items():
+            dtype = np.dtype(spec["dtype"])
+            start = data_start + spec["offset"]
+            if start + spec["count"] * dtype.itemsize > len(self._mmap):
+                raise ValueError(f"{path} : tableau {name} tronqué")
+            self.arrays[name] = np.frombuffer(self._mmap, dtype=dtype, count=spec["count"], offset=start)
+
+    @property
+    def total_length(self):
+        return self.header["total_length"]
+
+    @property
+    def normalization(self):
+        return self.header.get("normalization")
+
+    def coeffs(self):
+        """Coefficients sous forme de tableaux, acceptés tels quels par FourierEpicycles."""
+        return {name: self.arrays[name] for name in ("freqs", "amps", "phases", "coeff_vec") if name in self.arrays}
+
+def load_pack(path):
+    """(points, longueur, coefficients) comme DataLoader.data ; les points ne sont pas stockés (None)."""
+    pack = EpicyclePack(path)
+    return None, pack.total_length, pack.coeffs()
+
+def export_svg(svg_path, out_path, n_coeffs, strict=True):
+    """Charge un SVG, calcule ses coefficients et écrit le pack. Retourne le nombre de points."""
+    from svg_handler import SVGHandler
+    from fourier_engine import FourierEpicycles
+    points, total_length, meta = SVGHandler.load_svg(svg_path, strict=strict, return_meta=True)
+    coeffs = FourierEpicycles.compute_coeffs_static(points, n_coeffs)
+    write_pack(out_path, coeffs, total_length, normalization=meta, source=svg_path)
+    return len(points)
+
+def main():
+    parser = argparse.ArgumentParser(description="Exporte un SVG en pack d'épicycles précalculé (.epk).")
+    parser.add_argument("input", help="Fichier SVG")
+    parser.add_argument("-o", "--output", default=None, help="Pack de sortie (défaut : à côté du SVG)")
+    parser.add_argument("--coeffs", type=int, default=N_COEFFS_MAX, help="Nombre de fréquences (défaut : N_COEFFS_MAX)")
+    args = parser.parse_args()
+
+    out_path = args.output or os.path.splitext(args.input)[0] + PACK_EXTENSION
+    n_points = export_svg(args.input, out_path, args.coeffs)
+    print(f"{out_path} écrit ({2 * args.coeffs + 1} coefficients, {n_points} points source)")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
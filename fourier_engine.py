@@ -2,65 +2,267 @@ import pygame
 import numpy as np
 from settings import *
 from utils import hsv2rgb
+from profiler import PROFILER
+
+# ====== FFT HELPERS ======
+def fast_fft_len(n):
+    """Plus petite longueur >= n de la forme 2^a * 3^b * 5^c (rapide pour la FFT)."""
+    best = 1 << max(0, int(n - 1).bit_length())
+    p5 = 1
+    while p5 < best:
+        p35 = p5
+        while p35 < best:
+            p = p35
+            while p < n:
+                p *= 2
+            if p < best:
+                best = p
+            p35 *= 3
+        p5 *= 5
+    return best
+
+def resample_closed(points, m):
+    """Rééchantillonne un tracé fermé à m points (interpolation linéaire sur l'indice)."""
+    N = len(points)
+    if N == m:
+        return points
+    src = np.arange(N + 1)
+    closed = np.append(points, points[0])
+    dst = np.arange(m) * (N / m)
+    return np.interp(dst, src, closed.real) + 1j * np.interp(dst, src, closed.imag)
+
+def decimate_grid(pts, tol):
+    """
+    Décimation par grille : garde un point à chaque changement de cellule (taille tol).
+    Le premier et le dernier point sont toujours conservés.
+    """
+    if len(pts) <= 2:
+        return pts.copy()
+    cx = np.floor(pts.real / tol)
+    cy = np.floor(pts.imag / tol)
+    keep = np.empty(len(pts), dtype=bool)
+    keep[0] = True
+    keep[1:] = (cx[1:] != cx[:-1]) | (cy[1:] != cy[:-1])
+    keep[-1] = True
+    return pts[keep]
 
 # ====== BATCHER ======
 class TrailBatcher:
     """
     Système d'optimisation du rendu.
     Gère les "lots" de points statiques pour éviter de tout redessiner.
+    Tous les points vivent dans un seul tampon complex128 ; un lot n'est
+    qu'un intervalle [début, fin) de ce tampon, avec sa couleur.
     """
-    def __init__(self, dynamic_batch_size):
-        self.batches = [] 
-        self.current_points = []
+    def __init__(self, dynamic_batch_size, capacity=1024):
+        self.batch_size = dynamic_batch_size
+
+        # Tampon de points (agrandi par doublement si nécessaire)
+        self.buffer = np.empty(max(capacity, dynamic_batch_size + 1), dtype=np.complex128)
+        self.size = 0
+        self.active_start = 0   # Début du segment actif (non encore figé) dans le tampon
+
+        # Index des lots : bornes dans le tampon et couleurs
+        self.batch_bounds = np.empty((256, 2), dtype=np.int64)
+        self.batch_colors = np.empty((256, 3), dtype=np.uint8)
+        self.batch_bbox = np.empty((256, 4), dtype=np.float64)  # min x, min y, max x, max y
+        self.n_batches = 0
+
+        # Niveaux de détail : pour chaque tolérance, un tampon de points décimés
+        self.lod_tolerances = LOD_TOLERANCES
+        self.lod_buffers = [np.empty(max(capacity // 4, 64), dtype=np.complex128) for _ in LOD_TOLERANCES]
+        self.lod_sizes = [0] * len(LOD_TOLERANCES)
+        self.lod_bounds = np.empty((256, len(LOD_TOLERANCES), 2), dtype=np.int64)
+        self.lod_bias = 0       # Niveaux plus grossiers imposés (contrôle de qualité adaptatif)
+
         self.batch_start_time = 0.0
         self.total_points_count = 0
-        self.batch_size = dynamic_batch_size
+
+        # Couche de rendu mise en cache (lots terminés déjà dessinés)
+        self.cache_surface = None
+        self._cache_key = None
+        self._cached_batches = 0
+        self._last_key = None
+        self.dirty = True
         
     def reset(self):
-        self.batches = []
-        self.current_points = []
+        self.size = 0
+        self.active_start = 0
+        self.n_batches = 0
+        self.lod_sizes = [0] * len(self.lod_tolerances)
         self.batch_start_time = 0.0
         self.total_points_count = 0
-        
+        self.dirty = True
+
+    @property
+    def current_points(self):
+        """Segment actif : vue sur le tampon."""
+        return self.buffer[self.active_start:self.size]
+
+    def batch_points(self, i):
+        lo, hi = self.batch_bounds[i]
+        return self.buffer[lo:hi]
+
+    def batch_color(self, i):
+        return tuple(self.batch_colors[i].tolist())
+
+    def _reserve(self, n):
+        """Garantit la place pour n points de plus (seule allocation possible)."""
+        needed = self.size + n
+        if needed > len(self.buffer):
+            new_buffer = np.empty(max(needed, 2 * len(self.buffer)), dtype=np.complex128)
+            new_buffer[:self.size] = self.buffer[:self.size]
+            self.buffer = new_buffer
+
+    def _append_batch(self, lo, hi):
+        if self.n_batches == len(self.batch_bounds):
+            self.batch_bounds = np.concatenate((self.batch_bounds, np.empty_like(self.batch_bounds)))
+            self.batch_colors = np.concatenate((self.batch_colors, np.empty_like(self.batch_colors)))
+            self.batch_bbox = np.concatenate((self.batch_bbox, np.empty_like(self.batch_bbox)))
+            self.lod_bounds = np.concatenate((self.lod_bounds, np.empty_like(self.lod_bounds)))
+        hue = (self.batch_start_time * 1.5) % 1.0
+        pts = self.buffer[lo:hi]
+        i = self.n_batches
+        self.batch_bounds[i] = (lo, hi)
+        self.batch_colors[i] = hsv2rgb(hue, 0.7, 1.0)
+        self.batch_bbox[i] = (pts.real.min(), pts.imag.min(), pts.real.max(), pts.imag.max())
+        for level, tol in enumerate(self.lod_tolerances):
+            self._append_lod(level, i, decimate_grid(pts, tol))
+        self.n_batches += 1
+
+    def _append_lod(self, level, batch_idx, pts):
+        start = self.lod_sizes[level]
+        buf = self.lod_buffers[level]
+        if start + len(pts) > len(buf):
+            new_buf = np.empty(max(start + len(pts), 2 * len(buf)), dtype=np.complex128)
+            new_buf[:start] = buf[:start]
+            self.lod_buffers[level] = buf = new_buf
+        buf[start:start + len(pts)] = pts
+        self.lod_sizes[level] = start + len(pts)
+        self.lod_bounds[batch_idx, level] = (start, start + len(pts))
+
+    def _lod_level(self, zoom):
+        """Niveau le plus grossier dont l'erreur reste sous LOD_PIXEL_TOLERANCE (-1 = pleine résolution)."""
+        level = -1
+        for i, tol in enumerate(self.lod_tolerances):
+            if tol * zoom <= LOD_PIXEL_TOLERANCE:
+                level = i
+        return min(level + self.lod_bias, len(self.lod_tolerances) - 1)
+
+    def set_lod_bias(self, bias):
+        """Décale le niveau de détail vers le grossier ; le cache est redessiné si besoin."""
+        bias = max(0, int(bias))
+        if bias != self.lod_bias:
+            self.lod_bias = bias
+            self.dirty = True
+
+    def _visible_batches(self, first, last, cam, zoom):
+        """Indices des lots [first, last) dont la boîte englobante touche l'écran."""
+        margin = 2 / zoom  # Épaisseur du trait
+        left = (0 - CENTER_SCREEN[0]) / zoom - cam[0] - margin
+        right = (WINDOW_SIZE[0] - CENTER_SCREEN[0]) / zoom - cam[0] + margin
+        top = (0 - CENTER_SCREEN[1]) / zoom - cam[1] - margin
+        bottom = (WINDOW_SIZE[1] - CENTER_SCREEN[1]) / zoom - cam[1] + margin
+        bbox = self.batch_bbox[first:last]
+        visible = (bbox[:, 2] >= left) & (bbox[:, 0] <= right) & (bbox[:, 3] >= top) & (bbox[:, 1] <= bottom)
+        return first + np.flatnonzero(visible)
+
     def add_point(self, point, time_progression):
-        if len(self.current_points) == 0:
+        if self.size == self.active_start:
             self.batch_start_time = time_progression
-        self.current_points.append(point)
+        self._reserve(1)
+        self.buffer[self.size] = point
+        self.size += 1
         self.total_points_count += 1
         
-        if len(self.current_points) >= self.batch_size:
+        if self.size - self.active_start >= self.batch_size:
             self.flush_batch(time_progression)
             
     def flush_batch(self, current_time):
         """Transforme les points actifs en un lot statique."""
-        if len(self.current_points) < 2: return 
-        hue = (self.batch_start_time * 1.5) % 1.0
-        color = hsv2rgb(hue, 0.7, 1.0)
-        self.batches.append({'points': np.array(self.current_points), 'color': color})
-        
-        last_pt = self.current_points[-1]
-        self.current_points = [last_pt]
+        if self.size - self.active_start < 2: return 
+        self._append_batch(self.active_start, self.size)
+        # Le dernier point est partagé avec le lot suivant
+        self.active_start = self.size - 1
         self.batch_start_time = current_time
 
+    def add_points(self, points, times):
+        """Ajoute une série de points d'un coup (même découpage en lots que add_point)."""
+        i, n = 0, len(points)
+        self._reserve(n)
+        while i < n:
+            if self.size == self.active_start:
+                self.batch_start_time = times[i]
+            take = min(self.batch_size - (self.size - self.active_start), n - i)
+            self.buffer[self.size:self.size + take] = points[i:i + take]
+            self.size += take
+            self.total_points_count += take
+            i += take
+            if self.size - self.active_start >= self.batch_size:
+                self.flush_batch(times[i - 1])
+
     def cut(self, current_time):
         """Coupe le trait (lever le stylo)."""
-        if len(self.current_points) > 1:
-            hue = (self.batch_start_time * 1.5) % 1.0
-            color = hsv2rgb(hue, 0.7, 1.0)
-            self.batches.append({'points': np.array(self.current_points), 'color': color})
-        self.current_points = []
-
-    def draw(self, surf, apply_transform_func, cam, zoom):
-        for batch in self.batches:
-            raw_pts = batch['points']
-            x = (raw_pts.real + cam[0]) * zoom + CENTER_SCREEN[0]
-            y = (raw_pts.imag + cam[1]) * zoom + CENTER_SCREEN[1]
-            screen_pts = np.column_stack((x, y))
-            if len(screen_pts) > 1:
-                pygame.draw.lines(surf, batch['color'], False, screen_pts, 2)
+        if self.size - self.active_start > 1:
+            self._append_batch(self.active_start, self.size)
+        self.active_start = self.size
+
+    def _draw_batch_range(self, surf, first, last, cam, zoom):
+        """
+        Dessine les lots visibles de [first, last), au niveau de détail adapté au zoom :
+        une transformation vectorisée, puis des vues par lot.
+        """
+        if last <= first: return
+        idx = self._visible_batches(first, last, cam, zoom)
+        if len(idx) == 0: return
+        level = self._lod_level(zoom)
+        if level < 0:
+            buf, bounds = self.buffer, self.batch_bounds
+        else:
+            buf, bounds = self.lod_buffers[level], self.lod_bounds[:, level]
+
+        lo, hi = bounds[idx[0], 0], bounds[idx[-1], 1]
+        pts = buf[lo:hi]
+        screen_pts = np.column_stack(((pts.real + cam[0]) * zoom + CENTER_SCREEN[0],
+                                      (pts.imag + cam[1]) * zoom + CENTER_SCREEN[1]))
+        for i in idx.tolist():
+            b_lo, b_hi = bounds[i] - lo
+            if b_hi - b_lo > 1:
+                pygame.draw.lines(surf, self.batch_color(i), False, screen_pts[b_lo:b_hi], 2)
+
+    def draw(self, surf, cam, zoom):
+        # Clé de cache : zoom + caméra exacte (les lots sont dessinés à la position sous-pixel,
+        # un cache décalé ne serait plus aligné avec le segment actif et la tête)
+        key = (zoom, float(cam[0]), float(cam[1]))
+        stable = key == self._last_key
+        self._last_key = key
+
+        if not stable:
+            # La caméra bouge (mode suivi) : pas de cache, tableau écran recalculé d'un bloc
+            self._draw_batch_range(surf, 0, self.n_batches, cam, zoom)
+        else:
+            if self.cache_surface is None or self.cache_surface.get_size() != surf.get_size():
+                self.cache_surface = pygame.Surface(surf.get_size(), pygame.SRCALPHA)
+                self.dirty = True
+            if self.dirty or key != self._cache_key:
+                self.cache_surface.fill((0, 0, 0, 0))
+                self._cached_batches = 0
+                self._cache_key = key
+                self.dirty = False
+            if self._cached_batches < self.n_batches:
+                # Seuls les nouveaux lots terminés sont dessinés dans le cache
+                self._draw_batch_range(self.cache_surface, self._cached_batches, self.n_batches, cam, zoom)
+                self._cached_batches = self.n_batches
+            surf.blit(self.cache_surface, (0, 0))
             
-        if len(self.current_points) > 1:
-            pts = [apply_transform_func(p, cam, zoom) for p in self.current_points]
+        self.draw_active(surf, cam, zoom)
+
+    def draw_active(self, surf, cam, zoom):
+        """Segment actif (non figé), en blanc."""
+        active = self.current_points
+        if len(active) > 1:
+            pts = np.column_stack(((active.real + cam[0]) * zoom + CENTER_SCREEN[0],
+                                   (active.imag + cam[1]) * zoom + CENTER_SCREEN[1]))
             pygame.draw.lines(surf, (255, 255, 255), False, pts, 2)
 
 # ====== FOURIER ======
@@ -76,40 +278,212 @@ class FourierEpicycles:
         final_batch_size = max(100, calculated_batch_size)
         
         self.estimated_total_batches = int(self.estimated_simulation_points / final_batch_size)
-        self.batcher = TrailBatcher(final_batch_size)
+        self.batcher = TrailBatcher(final_batch_size, capacity=self.estimated_simulation_points + final_batch_size)
         
         self.overlay = pygame.Surface(WINDOW_SIZE, pygame.SRCALPHA)
         self.velocity_threshold = total_length * THRESHOLD_VELOCITY_FACTOR
         
-        coeffs = precomputed_coeffs
-        self.freqs = np.array([c["freq"] for c in coeffs])
-        self.amps = np.array([c["amp"] for c in coeffs])
-        self.phases = np.array([c["phase"] for c in coeffs])
-        self.draw_coeffs = coeffs 
-        
         self.prev_pos_physics = None 
         self.last_saved_pos = None
 
         self.show_vectors = True 
+        self.max_circles = MAX_DRAWN_CIRCLES
+        self.substep_scale = 1.0    # Facteur sur le nombre de sous-pas de physique par image
+        self.overlay_alpha = True   # False : épicycles opaques dessinés directement (sans calque alpha)
+
+        self.use_trajectory_table = TRAJECTORY_TABLE
+        self._trajectory = None
+        self._trajectory_dirty = True
+        self.active_count = None    # Nombre d'épicycles actifs (None = tous)
+        self._trail_stale = False
+        self.set_coeffs(precomputed_coeffs)
+
+    def set_coeffs(self, coeffs):
+        """
+        Remplace les coefficients à chaud (raffinement progressif) : le temps et le tracé
+        déjà dessiné sont conservés, seul le segment actif est coupé.
+        coeffs : liste de dicts {"freq","amp","phase"}, ou dict de tableaux
+        {"freqs","amps","phases"[,"coeff_vec"]} triés par amplitude décroissante.
+        """
+        if isinstance(coeffs, dict):
+            # Tableaux déjà prêts (pack d'épicycles en mémoire projetée) : utilisés sans copie
+            self._all_freqs = coeffs["freqs"]
+            self._all_amps = coeffs["amps"]
+            self._all_phases = coeffs["phases"]
+            self._all_coeff_vec = coeffs.get("coeff_vec")
+            if self._all_coeff_vec is None:
+                self._all_coeff_vec = self._all_amps * np.exp(1j * self._all_phases)
+        else:
+            self._all_freqs = np.array([c["freq"] for c in coeffs])
+            self._all_amps = np.array([c["amp"] for c in coeffs])
+            self._all_phases = np.array([c["phase"] for c in coeffs])
+            self._all_coeff_vec = self._all_amps * np.exp(1j * self._all_phases)
+        self._apply_active_count()
+        if self.prev_pos_physics is not None:
+            # La tête saute sur la nouvelle courbe : pas de trait entre l'ancienne et la nouvelle position
+            self.batcher.cut(self.time)
+            self.prev_pos_physics = None
+            self.last_saved_pos = None
+
+    def _apply_active_count(self):
+        """Coefficients actifs : vues sur les plus grandes amplitudes du spectre complet (aucune copie)."""
+        k = len(self._all_freqs) if self.active_count is None else min(self.active_count, len(self._all_freqs))
+        self.freqs = self._all_freqs[:k]
+        self.amps = self._all_amps[:k]
+        self.phases = self._all_phases[:k]
+        self.coeff_vec = self._all_coeff_vec[:k]
+        self._trajectory_dirty = True
+
+    @property
+    def max_count(self):
+        """Nombre de coefficients disponibles (spectre complet)."""
+        return len(self._all_freqs)
+
+    @property
+    def n_active(self):
+        """Nombre d'épicycles actifs."""
+        return len(self.freqs)
+
+    def set_active_count(self, count):
+        """
+        Change à chaud le nombre d'épicycles (les `count` plus grandes amplitudes).
+        Le tracé déjà dessiné correspond à l'ancienne courbe : il est reconstruit
+        à la prochaine image, jusqu'à l'instant courant.
+        """
+        # Le nombre demandé est conservé même s'il dépasse le spectre actuel (jeu progressif partiel) :
+        # il est réappliqué à chaque set_coeffs
+        self.active_count = max(1, int(count))
+        previous = self.n_active
+        self._apply_active_count()
+        if self.n_active != previous:
+            self._trail_stale = True
+
+    def rebuild_trail(self):
+        """Recalcule le tracé de t = 0 à l'instant courant avec les coefficients actifs."""
+        self._trail_stale = False
+        self.batcher.reset()
+        self.prev_pos_physics = None
+        self.last_saved_pos = None
+        # Pas d'environ un demi MIN_DRAW_DIST : la décimation retrouve la densité d'un tracé normal
+        n_steps = int(self.time * self.estimated_simulation_points * 2)
+        if n_steps < 1:
+            return
+        for times, positions, dt in self._trail_chunks(n_steps):
+            self._feed_trail(times, positions, dt)
+
+    def _trail_chunks(self, n_steps):
+        """
+        Blocs (instants, positions, pas) réguliers sur ]0, time], au moins n_steps instants, pour rebuild_trail.
+        Une seule IFFT évalue la courbe sur toute la grille (O(M log M) au lieu de steps × K),
+        sauf si la grille dépasse TRAJECTORY_TABLE_MAX_MB : évaluation directe par blocs.
+        """
+        M = fast_fft_len(max(int(np.ceil(n_steps / self.time)), self._min_grid_size()))
+        if M * np.dtype(np.complex128).itemsize > TRAJECTORY_TABLE_MAX_MB * 1024 * 1024:
+            yield from self._direct_trail_chunks(n_steps)
+            return
+        n = int(self.time * M)
+        curve = self._curve_on_grid(M)
+        for start in range(1, n + 1, TRAIL_REBUILD_CHUNK):
+            k = np.arange(start, min(start + TRAIL_REBUILD_CHUNK, n + 1))
+            yield k / M, curve[k % M], 1 / M
+
+    def _direct_trail_chunks(self, n_steps):
+        """Mêmes blocs évalués par positions_at : mémoire bornée par TRAIL_REBUILD_CHUNK."""
+        dt = self.time / n_steps
+        for start in range(0, n_steps, TRAIL_REBUILD_CHUNK):
+            times = np.arange(start + 1, min(start + TRAIL_REBUILD_CHUNK, n_steps) + 1) * dt
+            yield times, self.positions_at(times), dt
+
+    @staticmethod
+    def compute_coeffs_static(points, n, progress_callback=None, backend=None, publish_callback=None):
+        """
+        Calcule les coefficients de Fourier pour les fréquences -n..n.
+        Le backend ("fft" ou "dft") est choisi via COEFF_BACKEND par défaut.
+        publish_callback(coeffs) reçoit des jeux partiels (fréquences basses d'abord,
+        aux tailles PROGRESSIVE_STAGES) avant le résultat complet.
+        """
+        backend = backend or COEFF_BACKEND
+        if backend not in COEFF_BACKENDS:
+            raise ValueError(f"Backend de coefficients inconnu : {backend}")
+        return COEFF_BACKENDS[backend](points, n, progress_callback, publish_callback)
+
+    @staticmethod
+    def _freq_list(n):
+        return [0] + [k for i in range(1, n + 1) for k in (i, -i)]
 
     @staticmethod
-    def compute_coeffs_static(points, n, progress_callback=None):
-        """Calcule la Transformée de Fourier Discrète (DFT)."""
+    def compute_coeffs_dft(points, n, progress_callback=None, publish_callback=None):
+        """Calcule la Transformée de Fourier Discrète (DFT) directe, fréquence par fréquence."""
         N = len(points)
-        freqs = [0] + [k for i in range(1, n + 1) for k in (i, -i)]
+        freqs = FourierEpicycles._freq_list(n)
         t = np.arange(N)
         coeffs = []
         total_freqs = len(freqs)
+        # Les fréquences sont parcourues par |k| croissant : chaque étape publie un préfixe
+        publish_at = {2 * s + 1 for s in PROGRESSIVE_STAGES if s < n} if publish_callback else set()
         
         for idx, k in enumerate(freqs):
             c = np.sum(points * np.exp(-2j * np.pi * k * t / N)) / N
             coeffs.append({"freq": k, "amp": abs(c), "phase": np.angle(c)})
             if progress_callback and idx % 20 == 0:
                 progress_callback(idx / total_freqs)
+            if idx + 1 in publish_at:
+                publish_callback(sorted(coeffs, key=lambda x: x["amp"], reverse=True))
                 
         coeffs.sort(key=lambda x: x["amp"], reverse=True)
         return coeffs
 
+    @staticmethod
+    def compute_coeffs_fft(points, n, progress_callback=None, publish_callback=None):
+        """
+        Calcule les mêmes coefficients avec une seule FFT.
+        Le tracé est rééchantillonné sur une longueur "rapide" (2^a 3^b 5^c),
+        puis on extrait les fréquences -n..n du spectre.
+        Les aperçus publiés viennent d'un rééchantillonnage grossier (quelques points par fréquence).
+        """
+        points = np.asarray(points, dtype=np.complex128)
+        if progress_callback: progress_callback(0.0)
+        if publish_callback:
+            for stage in PROGRESSIVE_STAGES:
+                if stage < n and 8 * (2 * stage + 1) < len(points):
+                    publish_callback(FourierEpicycles.compute_coeffs_fft(resample_closed(points, 8 * (2 * stage + 1)), stage))
+
+        M = fast_fft_len(max(len(points), 2 * n + 1))
+        samples = resample_closed(points, M)
+        if progress_callback: progress_callback(0.3)
+
+        spectrum = np.fft.fft(samples) / M
+        if progress_callback: progress_callback(0.8)
+
+        freqs = FourierEpicycles._freq_list(n)
+        c = spectrum[np.array(freqs) % M]
+        amps = np.abs(c)
+        phases = np.angle(c)
+        coeffs = [{"freq": k, "amp": a, "phase": p} for k, a, p in zip(freqs, amps, phases)]
+        coeffs.sort(key=lambda x: x["amp"], reverse=True)
+
+        if progress_callback: progress_callback(1.0)
+        return coeffs
+
+    @staticmethod
+    def coeffs_max_deviation(points, coeffs, chunk=32):
+        """
+        Écart maximal (module) entre des coefficients calculés et la DFT directe
+        sur les mêmes points. Sert à valider le backend FFT.
+        """
+        points = np.asarray(points, dtype=np.complex128)
+        N = len(points)
+        t = np.arange(N) / N
+        freqs = np.array([c["freq"] for c in coeffs])
+        values = np.array([c["amp"] * np.exp(1j * c["phase"]) for c in coeffs])
+
+        max_dev = 0.0
+        for start in range(0, len(freqs), chunk):
+            f = freqs[start:start + chunk]
+            direct = np.exp(-2j * np.pi * np.outer(f, t)) @ points / N
+            max_dev = max(max_dev, float(np.max(np.abs(direct - values[start:start + chunk]))))
+        return max_dev
+
     def get_position_at(self, t):
         angles = self.freqs * (2 * np.pi * t) + self.phases
         vectors = self.amps * np.exp(1j * angles)
@@ -152,38 +526,377 @@ class FourierEpicycles:
             
         return pos
 
+    def build_trajectory(self):
+        """
+        Évalue la trajectoire complète sur une grille dense par une IFFT du spectre.
+        Retourne None si la table dépasse TRAJECTORY_TABLE_MAX_MB.
+        """
+        M = fast_fft_len(max(self.estimated_simulation_points * TRAJECTORY_OVERSAMPLE, self._min_grid_size()))
+        if (M + 1) * np.dtype(np.complex128).itemsize > TRAJECTORY_TABLE_MAX_MB * 1024 * 1024:
+            return None
+        table = np.empty(M + 1, dtype=np.complex128)
+        table[:M] = self._curve_on_grid(M)
+        table[M] = table[0]  # Période fermée pour l'interpolation
+        return table
+
+    def _min_grid_size(self):
+        """Plus petite grille représentant exactement les fréquences actives."""
+        max_freq = int(np.max(np.abs(self.freqs))) if len(self.freqs) else 0
+        return 2 * max_freq + 1
+
+    def _curve_on_grid(self, M):
+        """Positions aux instants k / M (k = 0..M-1) par une IFFT du spectre actif."""
+        spectrum = np.zeros(M, dtype=np.complex128)
+        np.add.at(spectrum, self.freqs % M, self.coeff_vec)
+        return np.fft.ifft(spectrum) * M
+
+    def trajectory(self):
+        """Table de trajectoire (construite à la demande), ou None en évaluation directe."""
+        if not self.use_trajectory_table:
+            return None
+        if self._trajectory_dirty:
+            self._trajectory = self.build_trajectory()
+            self._trajectory_dirty = False
+        return self._trajectory
+
+    def positions_at(self, times):
+        """
+        Positions pour un tableau d'instants : interpolation dans la table de trajectoire
+        si elle est disponible, sinon un produit matriciel (steps × K).
+        """
+        table = self.trajectory()
+        if table is not None:
+            M = len(table) - 1
+            x = np.asarray(times) * M
+            i = np.minimum(x.astype(np.int64), M - 1)
+            frac = x - i
+            return table[i] + (table[i + 1] - table[i]) * frac
+        return np.exp(2j * np.pi * np.outer(times, self.freqs)) @ self.coeff_vec
+
+    def point_times(self, n_points):
+        """Instant associé à chaque point du signal d'origine (point i -> i / N)."""
+        return np.arange(n_points) / n_points
+
+    def reconstruction_error(self, points):
+        """Erreur quadratique moyenne (unités monde) entre les points d'origine et la courbe des épicycles actifs."""
+        points = np.asarray(points, dtype=np.complex128)
+        times = self.point_times(len(points))
+        err2 = 0.0
+        for start in range(0, len(points), TRAIL_REBUILD_CHUNK):
+            chunk = slice(start, start + TRAIL_REBUILD_CHUNK)
+            err2 += float(np.sum(np.abs(self.positions_at(times[chunk]) - points[chunk]) ** 2))
+        return np.sqrt(err2 / max(len(points), 1))
+
+    def _decimate(self, pts):
+        """Indices des points à garder : à plus de MIN_DRAW_DIST du dernier point gardé."""
+        last = self.last_saved_pos
+        if (last is None or abs(pts[0] - last) > MIN_DRAW_DIST) and np.all(np.abs(np.diff(pts)) > MIN_DRAW_DIST):
+            # Cas courant (tracé rapide) : chaque point est assez loin du précédent
+            return np.arange(len(pts))
+        keep = []
+        for i, p in enumerate(pts.tolist()):
+            if last is None or abs(p - last) > MIN_DRAW_DIST:
+                keep.append(i)
+                last = p
+        return np.array(keep, dtype=np.int64)
+
+    def _feed_trail(self, times, positions, dt):
+        """Détection des sauts et filtrage des points, vectorisés sur un bloc sans rebouclage."""
+        prevs = np.empty_like(positions)
+        prevs[1:] = positions[:-1]
+        if self.prev_pos_physics is not None:
+            prevs[0] = self.prev_pos_physics
+        jumping = np.abs(positions - prevs) / (dt + 1e-9) > self.velocity_threshold
+        if self.prev_pos_physics is None:
+            jumping[0] = False
+        self.prev_pos_physics = positions[-1]
+
+        # Segments entre deux sauts : ajout groupé au batcher
+        bounds = np.flatnonzero(jumping).tolist() + [len(positions)]
+        start = 0
+        for j in bounds:
+            if j > start:
+                keep = self._decimate(positions[start:j]) + start
+                if len(keep):
+                    self.batcher.add_points(positions[keep], times[keep])
+                    self.last_saved_pos = positions[keep[-1]]
+            if j < len(positions):
+                self.batcher.cut(times[j])
+                self.last_saved_pos = None
+            start = j + 1
+
+    def advance_times(self, dt, steps):
+        """Avance l'horloge de `steps` pas ; retourne les instants et les indices de rebouclage."""
+        # Instants calculés pas à pas pour retrouver exactement les mêmes flottants
+        times = np.empty(steps)
+        wraps = []
+        t = self.time
+        for i in range(steps):
+            t += dt
+            if t > 1:
+                t -= 1
+                wraps.append(i)
+            times[i] = t
+        self.time = t
+        return times, wraps
+
+    def consume_positions(self, times, wraps, positions, dt):
+        """Alimente le tracé avec des positions déjà évaluées (remise à zéro à chaque tour)."""
+        for start, end in zip([0] + wraps, wraps + [len(times)]):
+            if start in wraps:
+                self.batcher.reset()
+                self.prev_pos_physics = None
+                self.last_saved_pos = None
+            if end > start:
+                self._feed_trail(times[start:end], positions[start:end], dt)
+        return positions[-1]
+
+    def update_physics_batch(self, dt, steps):
+        """
+        Équivalent de `steps` appels à update_physics(dt), évalués d'un bloc.
+        Retourne la dernière position calculée.
+        """
+        times, wraps = self.advance_times(dt, steps)
+        return self.consume_positions(times, wraps, self.positions_at(times), dt)
+
+    def frame_steps(self, visual_speed):
+        """Pas de temps et nombre de sous-pas d'une image à la vitesse visuelle donnée."""
+        dt_frame = visual_speed / self.total_length 
+        steps_dynamic = int(max(2, min(50, visual_speed * 3 * self.substep_scale)))
+        return dt_frame / steps_dynamic, steps_dynamic
+
+    def step_frame(self, visual_speed):
+        """Avance d'une image à la vitesse visuelle donnée (sous-pas adaptés). Retourne la tête."""
+        if self._trail_stale:
+            self.rebuild_trail()
+        sub_dt, steps_dynamic = self.frame_steps(visual_speed)
+        return self.update_physics_batch(sub_dt, steps_dynamic)
+
     def apply_transform(self, v, cam, zoom):
         x = (v.real + cam[0]) * zoom + CENTER_SCREEN[0]
         y = (v.imag + cam[1]) * zoom + CENTER_SCREEN[1]
         return (x, y)
 
+    def arm_chain(self, t):
+        """Extrémités successives des bras (somme cumulée des vecteurs) à l'instant t."""
+        vectors = self.coeff_vec * np.exp(1j * (2 * np.pi * t) * self.freqs)
+        return np.cumsum(vectors)
+
+    def _vector_color(self, rgba):
+        """Couleur du calque alpha, ou son mélange avec BG_COLOR quand le calque est désactivé."""
+        if self.overlay_alpha:
+            return rgba
+        a = rgba[3] / 255
+        return tuple(round(c * a + bg * (1 - a)) for c, bg in zip(rgba[:3], BG_COLOR))
+
+    def draw_vectors(self, layer, cam, zoom, chain=None):
+        """Bras et cercles visibles, dessinés sur `layer` (calque alpha, ou l'écran si overlay_alpha est coupé)."""
+        if chain is None:
+            chain = self.arm_chain(self.time)
+        if not len(chain):
+            return
+        # Origine + extrémités des bras, en coordonnées écran
+        sx = (np.concatenate(([0.0], chain.real)) + cam[0]) * zoom + CENTER_SCREEN[0]
+        sy = (np.concatenate(([0.0], chain.imag)) + cam[1]) * zoom + CENTER_SCREEN[1]
+        screen_r = self.amps * zoom
+
+        # Amplitudes triées : les bras de moins d'un demi-pixel sont tous en fin de chaîne
+        n_arms = int(np.count_nonzero(screen_r > 0.5))
+        if n_arms > 0:
+            arm_pts = np.column_stack((sx[:n_arms + 1], sy[:n_arms + 1]))
+            pygame.draw.aalines(layer, self._vector_color((100, 150, 100, 100)), False, arm_pts)
+
+        # Cercles visibles : assez grands, intersectant l'écran sans le contenir entièrement
+        cx, cy = sx[:-1], sy[:-1]
+        far_x = np.maximum(np.abs(cx), np.abs(cx - WINDOW_SIZE[0]))
+        far_y = np.maximum(np.abs(cy), np.abs(cy - WINDOW_SIZE[1]))
+        visible = ((screen_r > 2)
+                   & (cx + screen_r >= 0) & (cx - screen_r <= WINDOW_SIZE[0])
+                   & (cy + screen_r >= 0) & (cy - screen_r <= WINDOW_SIZE[1])
+                   & (far_x * far_x + far_y * far_y > screen_r * screen_r))
+        idx = np.flatnonzero(visible)
+        if self.max_circles is not None:
+            idx = idx[:self.max_circles]
+        big_color = self._vector_color((20, 150, 20, 40))
+        small_color = self._vector_color((20, 150, 20, 30))
+        for x, y, r in zip(cx[idx].astype(int).tolist(), cy[idx].astype(int).tolist(), screen_r[idx].tolist()):
+            color = big_color if r > 5 else small_color
+            pygame.draw.circle(layer, color, (x, y), int(r), 1)
+
+    def draw_head(self, surf, cam, zoom, current_math):
+        cp = self.apply_transform(current_math, cam, zoom)
+        pygame.draw.circle(surf, (255, 255, 255), (int(cp[0]), int(cp[1])), 4)
+
     def draw(self, surf, cam, zoom):
-        current_math = 0 + 0j
-        self.overlay.fill((0,0,0,0))
+        chain = self.arm_chain(self.time)
+        current_math = chain[-1] if len(chain) else 0 + 0j
         
-        for c in self.draw_coeffs:
-            prev_math = current_math
-            r = c["amp"]
-            angle = c["freq"] * (2*np.pi*self.time) + c["phase"]
-            current_math += c["amp"] * np.exp(1j * angle) 
-
-            if self.show_vectors:
-                screen_r = r * zoom
-                screen_prev = self.apply_transform(prev_math, cam, zoom)
-                screen_curr = self.apply_transform(current_math, cam, zoom)
-                
-                if screen_r > 5:
-                    pygame.draw.circle(self.overlay, (20, 150, 20, 40), (int(screen_prev[0]), int(screen_prev[1])), int(screen_r), 1)
-                    pygame.draw.aaline(self.overlay, (100, 150, 100, 100), screen_prev, screen_curr)
-                elif screen_r > 2:
-                    pygame.draw.circle(self.overlay, (20, 150, 20, 30), (int(screen_prev[0]), int(screen_prev[1])), int(screen_r), 1)
-                elif screen_r > 0.5:
-                    pygame.draw.aaline(self.overlay, (100, 150, 100, 40), screen_prev, screen_curr)
-
-        surf.blit(self.overlay, (0,0))
-        self.batcher.draw(surf, self.apply_transform, cam, zoom)
+        with PROFILER.timer("épicycles"):
+            if self.show_vectors and len(chain):
+                # Sans transparence : couleurs pré-mélangées au fond, pas de calque plein écran
+                if self.overlay_alpha:
+                    self.overlay.fill((0,0,0,0))
+                    self.draw_vectors(self.overlay, cam, zoom, chain)
+                    surf.blit(self.overlay, (0,0))
+                else:
+                    self.draw_vectors(surf, cam, zoom, chain)
+        with PROFILER.timer("tracé"):
+            self.batcher.draw(surf, cam, zoom)
         
-        cp = self.apply_transform(current_math, cam, zoom)
-        pygame.draw.circle(surf, (255, 255, 255), (int(cp[0]), int(cp[1])), 4)
-            
-        return current_math
\ No newline at end of file
+        self.draw_head(surf, cam, zoom, current_math)
+        return current_math
+
+COEFF_BACKENDS = {
+    "dft": FourierEpicycles.compute_coeffs_dft,
+    "fft": FourierEpicycles.compute_coeffs_fft,
+}
+
+# ====== SEGMENTED ======
+def create_epicycles(points, total_length, coeffs):
+    """Instance adaptée aux données chargées : transformée classique ou par groupes de traits."""
+    if isinstance(coeffs, list) and coeffs and "coeffs" in coeffs[0]:
+        return SegmentedEpicycles(points, total_length, coeffs)
+    return FourierEpicycles(points, total_length, coeffs)
+
+class SegmentedEpicycles(FourierEpicycles):
+    """
+    Transformée par groupes de traits : le signal est coupé aux plus grands sauts (levers de stylo),
+    chaque groupe a ses propres épicycles et les groupes se succèdent dans le temps.
+    Un groupe est prolongé par symétrie (aller puis retour) avant la FFT : le signal étendu
+    est fermé et continu, donc sans oscillations de Gibbs, et seul l'aller est parcouru.
+    Le budget d'épicycles est réparti entre groupes par amplitude ; seul le groupe courant est évalué.
+    """
+    def __init__(self, points, total_length, segments):
+        super().__init__(points, total_length, segments)
+        self.use_trajectory_table = False
+
+    @staticmethod
+    def split_strokes(points, max_groups=SEGMENT_MAX_GROUPS):
+        """Bornes [début, fin) des groupes : coupures aux max_groups - 1 plus grands sauts."""
+        N = len(points)
+        gaps = np.abs(np.diff(points))
+        if N < 2 * SEGMENT_MIN_POINTS or not np.any(gaps > 0):
+            return [(0, N)]
+        jumps = np.flatnonzero(gaps > SEGMENT_JUMP_FACTOR * np.median(gaps[gaps > 0]))
+        # Plus grands sauts d'abord ; un groupe trop court reste rattaché à son voisin
+        cuts = []
+        for j in jumps[np.argsort(gaps[jumps])[::-1]].tolist():
+            if len(cuts) >= max_groups - 1:
+                break
+            b = j + 1
+            if b < SEGMENT_MIN_POINTS or N - b < SEGMENT_MIN_POINTS:
+                continue
+            if all(abs(b - c) >= SEGMENT_MIN_POINTS for c in cuts):
+                cuts.append(b)
+        bounds = [0] + sorted(cuts) + [N]
+        return list(zip(bounds[:-1], bounds[1:]))
+
+    @staticmethod
+    def compute_segments_static(points, n, max_groups=SEGMENT_MAX_GROUPS):
+        """
+        Coefficients par groupe (fréquences -n..n au plus, triées par amplitude) :
+        [{"start", "end", "weight", "coeffs"}], start/end étant les bornes de temps du groupe.
+        """
+        points = np.asarray(points, dtype=np.complex128)
+        N = len(points)
+        segments = []
+        for lo, hi in SegmentedEpicycles.split_strokes(points, max_groups):
+            stroke = points[lo:hi]
+            extended = np.concatenate((stroke, stroke[::-1]))
+            n_group = max(0, min(n, len(stroke)))
+            segments.append({
+                "start": lo / N, "end": hi / N, "weight": hi - lo,
+                "coeffs": FourierEpicycles.compute_coeffs_fft(extended, n_group),
+            })
+        return segments
+
+    def set_coeffs(self, segments):
+        self.segments = segments
+        self.seg_starts = np.array([seg["start"] for seg in segments])
+        self.seg_ends = np.array([seg["end"] for seg in segments])
+        self._seg_all = []
+        for seg in segments:
+            freqs = np.array([c["freq"] for c in seg["coeffs"]])
+            amps = np.array([c["amp"] for c in seg["coeffs"]])
+            phases = np.array([c["phase"] for c in seg["coeffs"]])
+            self._seg_all.append((freqs, amps, phases, amps * np.exp(1j * phases)))
+        # Poids d'un coefficient dans l'erreur totale : amplitude² × nombre de points du groupe
+        self._scores = np.concatenate([amps ** 2 * seg["weight"] for (_, amps, _, _), seg in zip(self._seg_all, segments)])
+        self._apply_active_count()
+        self._trajectory_dirty = True
+        if self.prev_pos_physics is not None:
+            self.batcher.cut(self.time)
+            self.prev_pos_physics = None
+            self.last_saved_pos = None
+
+    def _apply_active_count(self):
+        """Répartit le budget entre groupes (plus grands scores), puis tranches par groupe (sans copie)."""
+        total = len(self._scores)
+        count = total if self.active_count is None else min(self.active_count, total)
+        sizes = np.array([len(f) for f, _, _, _ in self._seg_all])
+        # Minimum par groupe (sinon un petit trait réduit à sa position moyenne n'est plus dessiné),
+        # si le budget le permet ; le reste va aux plus grands scores
+        minimum = np.minimum(sizes, SEGMENT_MIN_COEFFS if count >= SEGMENT_MIN_COEFFS * len(sizes) else 1)
+        rank = np.concatenate([np.arange(n) for n in sizes])
+        group_of = np.repeat(np.arange(len(sizes)), sizes)
+        scores = np.where(rank < minimum[group_of], np.inf, self._scores)
+        if count < total:
+            chosen = np.argpartition(scores, total - count)[total - count:]
+        else:
+            chosen = np.arange(total)
+        counts = np.bincount(group_of[chosen], minlength=len(sizes))
+        self.group_counts = np.minimum(np.maximum(counts, 1), sizes)
+        self._seg_active = [tuple(a[:k] for a in arrays) for arrays, k in zip(self._seg_all, self.group_counts.tolist())]
+        self._select_group(self._group_at(self.time))
+
+    @property
+    def max_count(self):
+        return len(self._scores)
+
+    @property
+    def n_active(self):
+        return int(np.sum(self.group_counts))
+
+    def _group_at(self, t):
+        return int(min(np.searchsorted(self.seg_ends, t, side="right"), len(self.seg_ends) - 1))
+
+    def _select_group(self, g):
+        """freqs / amps / phases / coeff_vec : vues sur le groupe g (utilisées par le dessin des épicycles)."""
+        self.current_group = g
+        self.freqs, self.amps, self.phases, self.coeff_vec = self._seg_active[g]
+
+    def _local_times(self, g, times):
+        """Temps global -> temps du signal étendu du groupe (l'aller occupe [0, 1/2))."""
+        return (times - self.seg_starts[g]) / (self.seg_ends[g] - self.seg_starts[g]) * 0.5
+
+    def trajectory(self):
+        return None
+
+    def _trail_chunks(self, n_steps):
+        # Une courbe par groupe : évaluation directe, chaque instant ne somme que les coefficients de son groupe
+        return self._direct_trail_chunks(n_steps)
+
+    def positions_at(self, times):
+        times = np.asarray(times)
+        groups = np.minimum(np.searchsorted(self.seg_ends, times, side="right"), len(self.seg_ends) - 1)
+        positions = np.empty(len(times), dtype=np.complex128)
+        for g in np.unique(groups).tolist():
+            mask = groups == g
+            freqs, _, _, coeff_vec = self._seg_active[g]
+            tau = self._local_times(g, times[mask])
+            positions[mask] = np.exp(2j * np.pi * np.outer(tau, freqs)) @ coeff_vec
+        return positions
+
+    def point_times(self, n_points):
+        times = np.empty(n_points)
+        for seg in self.segments:
+            lo = int(round(seg["start"] * n_points))
+            hi = int(round(seg["end"] * n_points))
+            times[lo:hi] = seg["start"] + (np.arange(hi - lo) / (hi - lo)) * (seg["end"] - seg["start"])
+        return times
+
+    def arm_chain(self, t):
+        g = self._group_at(t)
+        self._select_group(g)
+        tau = self._local_times(g, t)
+        return np.cumsum(self.coeff_vec * np.exp(1j * (2 * np.pi * tau) * self.freqs))
@@ -0,0 +1,105 @@
+import os
+# Pas d'écran : pilote vidéo factice avant tout import de pygame
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")
+
+import sys
+import time
+import argparse
+import pygame
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor
+from settings import *
+from utils import draw_grid
+from loader_ui import load_shape
+from fourier_engine import create_epicycles
+
+# ====== HEADLESS RENDERER ======
+def render_frames(data, first, last, out_dir=None, pipe=None, visual_speed=2.0, zoom=1.0, show_vectors=True):
+    """
+    Rend les images [first, last) sur une surface hors écran, sans limite de FPS.
+    La simulation repart de t = 0 et avance sans dessin jusqu'à `first`,
+    pour que le tracé soit identique quel que soit le découpage.
+    Écrit des PNG dans out_dir, ou des images RGB brutes dans le flux binaire pipe.
+    """
+    points, total_length, coeffs = data
+    fourier = create_epicycles(points, total_length, coeffs)
+    fourier.show_vectors = show_vectors
+    surface = pygame.Surface(WINDOW_SIZE)
+    camera = np.array([0.0, 0.0])
+
+    for _ in range(first):
+        fourier.step_frame(visual_speed)
+
+    for frame in range(first, last):
+        fourier.step_frame(visual_speed)
+        surface.fill(BG_COLOR)
+        draw_grid(surface, camera, zoom)
+        fourier.draw(surface, camera, zoom)
+        if pipe is not None:
+            pipe.write(pygame.image.tobytes(surface, "RGB"))
+        else:
+            pygame.image.save(surface, os.path.join(out_dir, f"frame_{frame:05d}.png"))
+    return last - first
+
+def _render_range(args):
+    return render_frames(*args)
+
+def load_data(input_file, n_coeffs, use_cache=True):
+    """
+    Charge (ou lit depuis le cache) points, longueur et coefficients, dans le thread courant.
+    Sans aperçus progressifs : seul le jeu complet sert au rendu.
+    """
+    (points, total_length, coeffs), _ = load_shape(input_file, n_coeffs, use_cache)
+    return points, total_length, coeffs
+
+def main():
+    parser = argparse.ArgumentParser(description="Rendu hors écran (PNG ou flux RGB brut) d'une animation de Fourier.")
+    parser.add_argument("input", help="Fichier SVG à animer")
+    parser.add_argument("-o", "--out-dir", default="frames", help="Dossier des PNG (défaut : frames)")
+    parser.add_argument("--pipe", action="store_true", help="Écrit les images RGB brutes sur stdout (pour ffmpeg)")
+    parser.add_argument("-n", "--frames", type=int, default=None, help="Nombre d'images (défaut : un tour complet)")
+    parser.add_argument("--speed", type=float, default=2.0, help="Vitesse de tracé (comme les flèches Haut/Bas)")
+    parser.add_argument("--zoom", type=float, default=1.0)
+    parser.add_argument("--coeffs", type=int, default=N_COEFFS, help="Nombre de fréquences (défaut : N_COEFFS)")
+    parser.add_argument("--no-vectors", action="store_true", help="Masque les épicycles")
+    parser.add_argument("-j", "--workers", type=int, default=1, help="Processus en parallèle (PNG uniquement)")
+    parser.add_argument("--no-cache", action="store_true")
+    args = parser.parse_args()
+
+    if args.pipe and args.workers > 1:
+        parser.error("--pipe écrit un flux ordonné : utiliser --workers 1")
+    if args.pipe:
+        # stdout est réservé aux images : les messages texte partent sur stderr
+        pipe = sys.stdout.buffer
+        sys.stdout = sys.stderr
+
+    t0 = time.perf_counter()
+    data = load_data(args.input, args.coeffs, use_cache=not args.no_cache)
+    t_load = time.perf_counter() - t0
+
+    total_length = data[1]
+    n_frames = args.frames if args.frames is not None else int(np.ceil(total_length / args.speed))
+    options = (args.speed, args.zoom, not args.no_vectors)
+
+    t0 = time.perf_counter()
+    if args.pipe:
+        render_frames(data, 0, n_frames, None, pipe, *options)
+        pipe.flush()
+    else:
+        os.makedirs(args.out_dir, exist_ok=True)
+        workers = max(1, args.workers)
+        if workers == 1:
+            render_frames(data, 0, n_frames, args.out_dir, None, *options)
+        else:
+            bounds = np.linspace(0, n_frames, workers + 1).astype(int)
+            jobs = [(data, int(a), int(b), args.out_dir, None, *options) for a, b in zip(bounds, bounds[1:]) if b > a]
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                list(pool.map(_render_range, jobs))
+    t_render = time.perf_counter() - t0
+
+    print(f"{n_frames} images ({WINDOW_SIZE[0]}x{WINDOW_SIZE[1]}) - chargement {t_load:.2f}s, "
+          f"rendu {t_render:.2f}s ({n_frames / max(t_render, 1e-9):.1f} img/s)", file=sys.stderr)
+
+if __name__ == "__main__":
+    main()
@@ -1,59 +1,174 @@
 import threading
+from collections import deque
 import time
 import pygame
 import numpy as np
 from settings import *
-from utils import hsv2rgb
-from svg_handler import SVGHandler
-from fourier_engine import FourierEpicycles
+from utils import hsv2rgb, get_font, TextCache
+from fourier_engine import FourierEpicycles, SegmentedEpicycles
+from coeff_cache import CoeffCache, sampling_params
+from profiler import PROFILER
+
+# ====== LOADING ======
+def load_shape(filename, n_coeffs, use_cache=COEFF_CACHE_ENABLED, progress_callback=None,
+               publish_callback=None, svg_workers=None, segmented=SEGMENTED_TRANSFORM):
+    """
+    Charge un SVG et calcule ses coefficients, ou les lit depuis le cache disque.
+    Retourne ((points, longueur, coefficients), lu_en_cache).
+    Avec segmented=True, les coefficients sont ceux de SegmentedEpicycles : seuls les points
+    sont mis en cache, les FFT par groupe étant recalculées à chaque chargement.
+    Utilisable hors thread (workers de la scène, rendu sans écran).
+    Si le SVG est illisible, le coeur de repli est retourné mais pas mis en cache.
+    """
+    cache = CoeffCache() if use_cache else None
+    key = None
+    if cache:
+        params = {**sampling_params(), "backend": COEFF_BACKEND, "segmented": segmented}
+        key = CoeffCache.make_key(filename, n_coeffs, params)
+        cached = cache.load(key) if key else None
+        if cached:
+            if segmented:
+                points, total_length, _ = cached
+                return (points, total_length, SegmentedEpicycles.compute_segments_static(points, n_coeffs)), True
+            return cached, True
+
+    # Import différé : svg.path et les parseurs XML ne sont chargés qu'en cas d'absence du cache
+    from svg_handler import SVGHandler
+
+    def svg_progress(p):
+        if progress_callback: progress_callback(p * 0.5)
+        
+    try:
+        points, total_length = SVGHandler.load_svg(filename, progress_callback=svg_progress,
+                                                   strict=True, workers=svg_workers)
+        cacheable = True
+    except Exception as e:
+        # Repli sur le coeur, jamais mis en cache sous l'empreinte du SVG
+        print(f"Erreur chargement SVG: {e}")
+        points, total_length = SVGHandler.generate_heart()
+        cacheable = False
+    
+    if total_length == 0: total_length = 1
+    
+    def fourier_progress(p):
+        if progress_callback: progress_callback(0.5 + (p * 0.5))
+
+    def fourier_publish(partial_coeffs):
+        publish_callback((points, total_length, partial_coeffs))
+
+    with PROFILER.timer("transformée"):
+        if segmented:
+            coeffs = SegmentedEpicycles.compute_segments_static(points, n_coeffs)
+        else:
+            coeffs = FourierEpicycles.compute_coeffs_static(
+                points, n_coeffs, progress_callback=fourier_progress,
+                publish_callback=fourier_publish if publish_callback else None)
+    if COEFF_CHECK and not segmented:
+        dev = FourierEpicycles.coeffs_max_deviation(points, coeffs)
+        print(f"Backend {COEFF_BACKEND} : écart max avec la DFT directe = {dev:.3e}")
+    
+    if cache and key and cacheable:
+        try:
+            cache.store(key, points, total_length, [] if segmented else coeffs)
+        except OSError as e:
+            print(f"Cache indisponible : {e}")
+    return (points, total_length, coeffs), False
 
 # ====== LOADER THREAD ======
 class DataLoader(threading.Thread):
     """
     Thread séparé pour charger le SVG et calculer Fourier sans geler l'interface.
     """
-    def __init__(self, filename, n_coeffs):
+    def __init__(self, filename, n_coeffs, use_cache=COEFF_CACHE_ENABLED, progressive=PROGRESSIVE_COEFFS):
         super().__init__()
         self.filename = filename
         self.n_coeffs = n_coeffs
+        self.use_cache = use_cache
+        self.progressive = progressive
         self.progress = 0.0
         self.done = False
         self.data = None
+        # Mode progressif : dernier jeu (points, longueur, coefficients) publié et son numéro
+        self.partial = None
+        self.partial_version = 0
+
+    def publish(self, data):
+        """Rend un jeu de coefficients (partiel ou complet) visible pour l'interface."""
+        self.partial = data
+        self.partial_version += 1
 
     def run(self):
-        def svg_progress(p):
-            self.progress = p * 0.5
-            
-        points, total_length = SVGHandler.load_svg(self.filename, progress_callback=svg_progress)
-        
-        if total_length == 0: total_length = 1
-        
-        def fourier_progress(p):
-            self.progress = 0.5 + (p * 0.5)
+        def progress(p):
+            self.progress = p
+
+        data, from_cache = load_shape(self.filename, self.n_coeffs, self.use_cache, progress_callback=progress,
+                                      publish_callback=self.publish if self.progressive else None)
 
-        coeffs = FourierEpicycles.compute_coeffs_static(points, self.n_coeffs, progress_callback=fourier_progress)
-        
         self.progress = 1.0
-        time.sleep(0.2)
+        if not from_cache and not self.progressive:
+            time.sleep(0.2)
         
-        self.data = (points, total_length, coeffs)
+        self.data = data
+        self.publish(self.data)
         self.done = True
 
 # ====== MINI INFINITY LOADER ======
 class MiniInfinityLoader:
     """Petite animation d'attente pendant le calcul."""
     def __init__(self):
-        # Création de la forme infini
-        t = np.linspace(0, 2*np.pi, 200)
-        scale = 60
-        x = scale * np.cos(t)
-        y = scale * np.sin(t) * np.cos(t)
-        points = x + 1j * y
-        
-        self.coeffs = FourierEpicycles.compute_coeffs_static(points, 5)
+        # Forme infini : x = 60 cos t, y = 60 sin t cos t = 30 sin 2t, soit
+        # 30 e^{it} + 30 e^{-it} + 15 e^{2it} - 15 e^{-2it} (coefficients exacts, sans DFT au démarrage)
+        self.coeffs = [
+            {"freq": 1, "amp": 30.0, "phase": 0.0},
+            {"freq": -1, "amp": 30.0, "phase": 0.0},
+            {"freq": 2, "amp": 15.0, "phase": 0.0},
+            {"freq": -2, "amp": 15.0, "phase": np.pi},
+        ]
         self.time = 0.0
-        self.trail = []
         self.trail_length = 150
+        self.trail = deque(maxlen=self.trail_length)
+        # Couleurs du tracé : teinte par segment, atténuée selon sa position ; une palette par longueur de tracé
+        self._hues = [hsv2rgb((i * 0.003 + 0.5) % 1.0, 0.6, 1.0) for i in range(self.trail_length)]
+        self._palettes = {}
+        # Textes fixes (titre, rappel des commandes) rendus une seule fois par police
+        self._static_font = None
+        self._title_surf = None
+        self._help_surf = None
+
+    def _palette(self, n):
+        """Couleurs des n - 1 segments d'un tracé de n points (calculées une fois par longueur)."""
+        palette = self._palettes.get(n)
+        if palette is None:
+            palette = self._palettes[n] = [
+                tuple(max(0, c * (i / n)) for c in self._hues[i]) for i in range(n - 1)
+            ]
+        return palette
+
+    def _render_static(self, font):
+        self._static_font = font
+        self._texts = TextCache(font)
+        self._title_surf = font.render("Génération de Fourier...", True, (220, 220, 220))
+
+        # RAPPEL DES COMMANDES
+        controls_help = [
+            "COMMANDES DU PROGRAMME :",
+            "[F] : Caméra suiveuse (Follow)",
+            "[H] : Cacher/Montrer les vecteurs",
+            "[R] : Réinitialiser le tracé",
+            "[+/-] : Zoomer / Dézoomer",
+            "[Haut/Bas] : Vitesse de tracé"
+        ]
+        small_font = get_font("consolas", 14)
+        lines = []
+        for i, line in enumerate(controls_help):
+            color = (150, 150, 255) if i == 0 else (100, 100, 120)
+            f = font if i == 0 else small_font
+            lines.append(f.render(line, True, color))
+
+        width = max(line.get_width() for line in lines)
+        self._help_surf = pygame.Surface((width, 20 * (len(lines) - 1) + lines[-1].get_height()), pygame.SRCALPHA)
+        for i, line in enumerate(lines):
+            self._help_surf.blit(line, (0, i * 20))
 
     def update(self):
         self.time += 0.005 
@@ -62,9 +177,10 @@ class MiniInfinityLoader:
     def draw(self, screen, font, progress):
         cx, cy = WINDOW_SIZE[0] // 2, WINDOW_SIZE[1] // 2 - 50 
         
-        loading_txt = font.render("Génération de Fourier...", True, (220, 220, 220))
-        loading_rect = loading_txt.get_rect(center=(WINDOW_SIZE[0]//2, cy - 90))
-        screen.blit(loading_txt, loading_rect)
+        if font is not self._static_font:
+            self._render_static(font)
+        loading_rect = self._title_surf.get_rect(center=(WINDOW_SIZE[0]//2, cy - 90))
+        screen.blit(self._title_surf, loading_rect)
 
         # Dessin du loader
         current_pos = 0+0j
@@ -82,15 +198,11 @@ class MiniInfinityLoader:
             pygame.draw.line(screen, (80, 80, 80), p1, p2, 1)
 
         self.trail.append((cx + current_pos.real, cy + current_pos.imag))
-        if len(self.trail) > self.trail_length:
-            self.trail.pop(0)
 
         if len(self.trail) > 1:
-            for i in range(len(self.trail) - 1):
-                hue = (i * 0.003 + 0.5) % 1.0
-                color = hsv2rgb(hue, 0.6, 1.0)
-                fade_col = tuple(max(0, c * (i/len(self.trail))) for c in color)
-                pygame.draw.line(screen, fade_col, self.trail[i], self.trail[i+1], 2)
+            trail = list(self.trail)
+            for color, p1, p2 in zip(self._palette(len(trail)), trail, trail[1:]):
+                pygame.draw.line(screen, color, p1, p2, 2)
 
         # Barre de progression
         bar_width = 300
@@ -102,32 +214,10 @@ class MiniInfinityLoader:
         pygame.draw.rect(screen, (100, 200, 100), fill_rect)
 
         pct_text = f"{int(progress * 100)}%"
-        txt_surf = font.render(pct_text, True, (200, 200, 200))
+        txt_surf = self._texts.render("pct", pct_text, (200, 200, 200))
         txt_rect = txt_surf.get_rect(center=(WINDOW_SIZE[0]//2, cy + 100))
         screen.blit(txt_surf, txt_rect)
 
-        # RAPPEL DES COMMANDES
-        controls_help = [
-            "COMMANDES DU PROGRAMME :",
-            "[F] : Caméra suiveuse (Follow)",
-            "[H] : Cacher/Montrer les vecteurs",
-            "[R] : Réinitialiser le tracé",
-            "[+/-] : Zoomer / Dézoomer",
-            "[Haut/Bas] : Vitesse de tracé"
-        ]
-        
-        max_width = 0
-        temp_font_small = pygame.font.SysFont("consolas", 14)
-        for i, line in enumerate(controls_help):
-            f = font if i == 0 else temp_font_small
-            w, h = f.size(line)
-            if w > max_width: max_width = w
-        
-        block_x_start = (WINDOW_SIZE[0] - max_width) // 2
-        start_y_help = cy + 150
-        
-        for i, line in enumerate(controls_help):
-            color = (150, 150, 255) if i == 0 else (100, 100, 120)
-            f_size = font if i == 0 else temp_font_small
-            help_surf = f_size.render(line, True, color)
-            screen.blit(help_surf, (block_x_start, start_y_help + i * 20))
\ No newline at end of file
+        # Rappel des commandes (pré-rendu)
+        block_x_start = (WINDOW_SIZE[0] - self._help_surf.get_width()) // 2
+        screen.blit(self._help_surf, (block_x_start, cy + 150))
@@ -1,10 +1,50 @@
 import sys
+import time
+# Référence du temps jusqu'à la première image (imports compris)
+START_TIME = time.perf_counter()
 import pygame
 import numpy as np
 from settings import *
-from utils import draw_grid
-from loader_ui import DataLoader, MiniInfinityLoader
-from fourier_engine import FourierEpicycles
+from utils import draw_grid, get_font, TextCache
+from fourier_engine import FourierEpicycles, create_epicycles
+from coeff_cache import CoeffCache
+from profiler import PROFILER
+from quality import QualityController
+from epicycle_pack import is_pack, load_pack
+
+# ====== HUD ======
+def draw_hud(screen, texts, clock, fourier, visual_speed, follow, zoom, quality):
+    """Infos (en haut à gauche) et rappel des commandes (en haut à droite), rendues seulement si elles changent."""
+    pct_complete = 0
+    if fourier.estimated_simulation_points > 0:
+        pct_complete = (fourier.batcher.total_points_count / fourier.estimated_simulation_points) * 100
+
+    infos = [
+        f"FPS: {int(clock.get_fps())}",
+        f"Batches: {fourier.batcher.n_batches}",
+        f"Cercles : {fourier.n_active} / {fourier.max_count}",
+        f"Points tracés: {fourier.batcher.total_points_count} ({pct_complete:.1f}%)",
+        f"Vitesse : {visual_speed:.2f}x",
+        f"Qualité : {quality.label()}",
+    ]
+    for i, info in enumerate(infos):
+        txt = texts.render(("info", i), info, (200, 200, 200))
+        screen.blit(txt, (10, 10 + i * 20))
+        
+    controls = [
+        f"[F] - Suivre ({'ON' if follow else 'OFF'})",
+        f"[H] - Vecteurs ({'ON' if fourier.show_vectors else 'OFF'})",
+        "[R] - Reset",
+        f"[+/-] Zoom ({zoom:.2f}x)",
+        "[Haut/Bas] Vitesse",
+        "[Gauche/Droite] Cercles",
+        f"[P] Profilage ({'ON' if PROFILER.visible else 'OFF'})",
+        f"[Q] Qualité auto ({'ON' if quality.enabled else 'OFF'})",
+    ]
+    for i, ctrl in enumerate(controls):
+        txt = texts.render(("control", i), ctrl, (150, 150, 150))
+        txt_rect = txt.get_rect(topright=(WINDOW_SIZE[0] - 10, 10 + i * 20))
+        screen.blit(txt, txt_rect)
 
 # ====== MAIN ======
 def main():
@@ -13,108 +53,155 @@ def main():
     screen = pygame.display.set_mode(WINDOW_SIZE, pygame.DOUBLEBUF) 
     pygame.display.set_caption("Fourier - Accurate Loader & Classic GUI")
     clock = pygame.time.Clock()
-    font = pygame.font.SysFont("consolas", 16)
-    big_font = pygame.font.SysFont("consolas", 20)
+    font = get_font("consolas", 16)
+    big_font = get_font("consolas", 20)
+    hud_texts = TextCache(font)
 
     # === GESTION ARGUMENTS ===
     # Si un argument est passé, on l'utilise, sinon on prend le défaut
+    # Options : --no-cache (ignore le cache disque), --clear-cache (le vide avant de charger),
+    # --profile (chronomètres + overlay), --trace=fichier.json (trace Chrome écrite en quittant)
+    flags = [a for a in sys.argv[1:] if a.startswith("--")]
+    args = [a for a in sys.argv[1:] if not a.startswith("--")]
+    use_cache = COEFF_CACHE_ENABLED and "--no-cache" not in flags
+    if "--clear-cache" in flags:
+        CoeffCache().clear()
+        print("Cache des coefficients vidé.")
+    if "--profile" in flags:
+        PROFILER.enabled = True
+        PROFILER.visible = True
+    trace_path = next((f.split("=", 1)[1] for f in flags if f.startswith("--trace=")), None)
+    if trace_path:
+        PROFILER.start_trace()
+
     input_file = DEFAULT_INPUT_PATH
-    if len(sys.argv) > 1:
-        input_file = sys.argv[1]
+    if args:
+        input_file = args[0]
         print(f"Chargement du fichier : {input_file}")
     else:
         print(f"Aucun argument, chargement par défaut : {input_file}")
 
     # Initialisation
-    mini_loader = MiniInfinityLoader()
-    # On utilise 'input_file' défini ci-dessus
-    loader = DataLoader(input_file, N_COEFFS)
-    loader.start()
-    
     fourier = None
+    coeffs_version = 0
+    mini_loader = loader = None
+    if is_pack(input_file):
+        # Pack précalculé : démarrage immédiat, sans importer la chaîne SVG (svg.path, XML)
+        try:
+            pack_data = load_pack(input_file)
+        except (OSError, ValueError) as e:
+            # Pack absent, tronqué ou d'une autre version : même repli que pour un SVG illisible
+            print(f"Erreur chargement pack: {e}")
+            from svg_handler import SVGHandler
+            points, total_length = SVGHandler.generate_heart()
+            pack_data = (points, total_length, FourierEpicycles.compute_coeffs_static(points, N_COEFFS_MAX))
+    else:
+        from loader_ui import DataLoader, MiniInfinityLoader
+        mini_loader = MiniInfinityLoader()
+        # Spectre maximal calculé (ou lu en cache) une fois, N_COEFFS fréquences actives au départ
+        loader = DataLoader(input_file, N_COEFFS_MAX, use_cache=use_cache)
+        loader.start()
     camera = np.array([0.0, 0.0])
     zoom = 1.0
     visual_speed = 2.0 
     follow = False
+    quality = QualityController()
     
     running = True
     app_state = "LOADING"
+    # Temps jusqu'à la première image affichée, puis jusqu'à la première image du dessin
+    first_frame_reported = first_drawing_reported = False
+    if loader is None:
+        fourier = create_epicycles(*pack_data)
+        fourier.set_active_count(2 * N_COEFFS + 1)
+        quality.apply(fourier)
+        app_state = "RUNNING"
     
     while running:
+        frame_start = time.perf_counter()
         for e in pygame.event.get():
             if e.type == pygame.QUIT: running = False
             if e.type == pygame.KEYDOWN:
                 if e.key == pygame.K_ESCAPE: running = False
+                if e.key == pygame.K_p: PROFILER.toggle_overlay()
                 if app_state == "RUNNING":
                     if e.key == pygame.K_f: follow = not follow
                     if e.key == pygame.K_r: fourier.batcher.reset()
                     if e.key == pygame.K_h: fourier.show_vectors = not fourier.show_vectors
+                    if e.key == pygame.K_q:
+                        quality.toggle()
+                        quality.apply(fourier)
                     if e.key in (pygame.K_KP_PLUS, pygame.K_PLUS): zoom *= 1.1
                     if e.key in (pygame.K_KP_MINUS, pygame.K_MINUS): zoom /= 1.1
                     if e.key == pygame.K_UP: visual_speed = min(10, visual_speed + 0.5)
                     if e.key == pygame.K_DOWN: visual_speed = max(0.5, visual_speed - 0.5)
+                    if e.key == pygame.K_RIGHT: fourier.set_active_count(fourier.n_active * COEFF_COUNT_STEP + 1)
+                    if e.key == pygame.K_LEFT: fourier.set_active_count(fourier.n_active / COEFF_COUNT_STEP)
 
         if app_state == "LOADING":
             screen.fill(BG_COLOR)
             mini_loader.update()
             mini_loader.draw(screen, big_font, loader.progress)
             
-            if loader.done:
-                points, total_length, coeffs = loader.data
-                fourier = FourierEpicycles(points, total_length, coeffs)
+            # Mode progressif : on démarre dès le premier jeu partiel publié
+            if loader.partial is not None:
+                coeffs_version = loader.partial_version  # Lu avant le jeu : au pire, un échange de trop
+                points, total_length, coeffs = loader.partial
+                fourier = create_epicycles(points, total_length, coeffs)
+                fourier.set_active_count(2 * N_COEFFS + 1)
+                quality.apply(fourier)
                 app_state = "RUNNING"
                 
         elif app_state == "RUNNING":
             screen.fill(BG_COLOR)
+
+            if loader is not None and loader.partial_version != coeffs_version:
+                # Jeu plus précis arrivé : échange à chaud, le tracé continue
+                coeffs_version = loader.partial_version
+                fourier.set_coeffs(loader.partial[2])
             
-            dt_frame = visual_speed / fourier.total_length 
-            steps_dynamic = int(max(2, min(50, visual_speed * 3)))
-            sub_dt = dt_frame / steps_dynamic
-            
-            current_head_pos = 0+0j
-            for _ in range(steps_dynamic):
-                current_head_pos = fourier.update_physics(sub_dt)
+            with PROFILER.timer("physique"):
+                current_head_pos = fourier.step_frame(visual_speed)
 
             if follow:
                 target_cam = np.array([-current_head_pos.real, -current_head_pos.imag])
                 camera = camera + (target_cam - camera) * 0.05
             else:
                 camera = camera + (np.array([0.0, 0.0]) - camera) * 0.1
+                if np.max(np.abs(camera)) * zoom < CAMERA_SNAP_PX:
+                    # Retour au centre terminé : caméra fixe, le tracé peut de nouveau venir du cache
+                    camera = np.array([0.0, 0.0])
 
-            draw_grid(screen, camera, zoom)
+            with PROFILER.timer("grille"):
+                draw_grid(screen, camera, zoom)
             fourier.draw(screen, camera, zoom)
 
-            pct_complete = 0
-            if fourier.estimated_simulation_points > 0:
-                pct_complete = (fourier.batcher.total_points_count / fourier.estimated_simulation_points) * 100
+            with PROFILER.timer("texte"):
+                draw_hud(screen, hud_texts, clock, fourier, visual_speed, follow, zoom, quality)
 
-            infos = [
-                f"FPS: {int(clock.get_fps())}",
-                f"Batches: {len(fourier.batcher.batches)}",
-                f"Points tracés: {fourier.batcher.total_points_count} ({pct_complete:.1f}%)",
-                f"Vitesse : {visual_speed:.2f}x",
-            ]
-            for i, info in enumerate(infos):
-                txt = font.render(info, True, (200, 200, 200))
-                screen.blit(txt, (10, 10 + i * 20))
-                
-            controls = [
-                f"[F] - Suivre ({'ON' if follow else 'OFF'})",
-                f"[H] - Vecteurs ({'ON' if fourier.show_vectors else 'OFF'})",
-                "[R] - Reset",
-                f"[+/-] Zoom ({zoom:.2f}x)",
-                "[Haut/Bas] Vitesse",
-            ]
-            for i, ctrl in enumerate(controls):
-                txt = font.render(ctrl, True, (150, 150, 150))
-                txt_rect = txt.get_rect(topright=(WINDOW_SIZE[0] - 10, 10 + i * 20))
-                screen.blit(txt, txt_rect)
+            PROFILER.draw(screen, font)
 
-        pygame.display.flip()
-        clock.tick(60)
+        with PROFILER.timer("affichage"):
+            pygame.display.flip()
+        # Temps de calcul de l'image, hors attente de clock.tick
+        frame_time = time.perf_counter() - frame_start
+        if not first_frame_reported:
+            first_frame_reported = True
+            print(f"Première image : {(time.perf_counter() - START_TIME) * 1000:.0f} ms")
+        if not first_drawing_reported and app_state == "RUNNING":
+            first_drawing_reported = True
+            print(f"Première image du dessin : {(time.perf_counter() - START_TIME) * 1000:.0f} ms")
+        if PROFILER.enabled:
+            PROFILER.record("image", frame_start, frame_time)
+        if app_state == "RUNNING" and quality.update(frame_time):
+            quality.apply(fourier)
+        clock.tick(TARGET_FPS)
 
-    if loader.is_alive():
+    if loader is not None and loader.is_alive():
         loader.join(timeout=1.0)
+    if trace_path:
+        n_events = PROFILER.dump_trace(trace_path)
+        print(f"Trace écrite : {trace_path} ({n_events} événements)")
     pygame.quit()
     sys.exit()
 
@@ -0,0 +1,121 @@
+import json
+import time
+import threading
+from collections import deque
+import pygame
+import numpy as np
+from settings import *
+
+# ====== PROFILER ======
+class _NullTimer:
+    """Chronomètre inactif : partagé, ne fait rien (coût quasi nul quand le profiler est coupé)."""
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+_NULL_TIMER = _NullTimer()
+
+class _Timer:
+    __slots__ = ("profiler", "name", "start")
+
+    def __init__(self, profiler, name):
+        self.profiler = profiler
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.profiler.record(self.name, self.start, time.perf_counter() - self.start)
+        return False
+
+class Profiler:
+    """
+    Chronomètres nommés autour des étapes du rendu et du chargement.
+    Garde une fenêtre glissante de durées par étape (percentiles pour l'overlay)
+    et, si demandé, une trace au format Chrome (chrome://tracing, Perfetto).
+    """
+    def __init__(self, enabled=PROFILER_ENABLED, window=PROFILER_WINDOW):
+        self.enabled = enabled
+        self.window = window
+        self.samples = {}
+        self.visible = False
+        self.trace = None
+        self._enabled_before_overlay = None  # État à rétablir quand l'overlay affiché par P est masqué
+        self._origin = time.perf_counter()
+
+    def timer(self, name):
+        """À utiliser avec `with PROFILER.timer("étape"):`."""
+        if not self.enabled:
+            return _NULL_TIMER
+        return _Timer(self, name)
+
+    def record(self, name, start, duration):
+        samples = self.samples.get(name)
+        if samples is None:
+            samples = self.samples[name] = deque(maxlen=self.window)
+        samples.append(duration)
+        if self.trace is not None:
+            self.trace.append({
+                "name": name, "ph": "X", "pid": 1, "tid": threading.get_ident(),
+                "ts": (start - self._origin) * 1e6, "dur": duration * 1e6,
+            })
+
+    def start_trace(self, max_events=PROFILER_TRACE_MAX_EVENTS):
+        self.enabled = True
+        self.trace = deque(maxlen=max_events)
+
+    def dump_trace(self, path):
+        """Écrit la trace (format JSON "Trace Event") ; retourne le nombre d'événements."""
+        if self.trace is None:
+            return 0
+        events = list(self.trace)
+        with open(path, "w") as f:
+            json.dump({"traceEvents": events, "displayTimeUnit": "ms"}, f)
+        return len(events)
+
+    def toggle_overlay(self):
+        """
+        Affiche l'overlay (chronomètres activés) ou le masque : les chronomètres reprennent alors
+        l'état d'avant l'affichage, sauf si une trace est en cours.
+        """
+        self.visible = not self.visible
+        if self.visible:
+            self._enabled_before_overlay = self.enabled
+            self.enabled = True
+        elif self._enabled_before_overlay is not None:
+            self.enabled = self._enabled_before_overlay or self.trace is not None
+            self._enabled_before_overlay = None
+
+    def stats(self):
+        """{étape: (p50, p95, max)} en millisecondes, sur la fenêtre glissante."""
+        result = {}
+        for name, samples in list(self.samples.items()):
+            if samples:
+                data = np.fromiter(samples, dtype=np.float64) * 1000
+                p50, p95 = np.percentile(data, (50, 95))
+                result[name] = (p50, p95, data.max())
+        return result
+
+    def draw(self, surf, font):
+        if not self.visible: return
+        lines = [f"{'étape':<16}{'p50':>8}{'p95':>8}{'max':>8}  (ms)"]
+        for name, (p50, p95, mx) in sorted(self.stats().items()):
+            lines.append(f"{name:<16}{p50:8.2f}{p95:8.2f}{mx:8.2f}")
+
+        line_h = font.get_linesize()
+        width = max(font.size(line)[0] for line in lines) + 20
+        height = line_h * len(lines) + 10
+        top = WINDOW_SIZE[1] - height - 10
+        panel = pygame.Surface((width, height), pygame.SRCALPHA)
+        panel.fill((0, 0, 0, 170))
+        surf.blit(panel, (10, top))
+        for i, line in enumerate(lines):
+            color = (150, 150, 255) if i == 0 else (200, 200, 200)
+            surf.blit(font.render(line, True, color), (20, top + 5 + i * line_h))
+
+# Instance partagée par tous les modules
+PROFILER = Profiler()
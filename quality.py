@@ -0,0 +1,64 @@
+from settings import *
+
+# ====== ADAPTIVE QUALITY ======
+class QualityController:
+    """
+    Surveille le temps de calcul de chaque image (hors attente de clock.tick)
+    et choisit un niveau de QUALITY_LEVELS pour tenir TARGET_FPS :
+    nombre de cercles dessinés, sous-pas de physique, niveau de détail du tracé, calque alpha.
+    Hystérésis : on baisse vite quand le budget est dépassé, on remonte lentement avec de la marge.
+    """
+    def __init__(self, target_fps=TARGET_FPS, levels=QUALITY_LEVELS, enabled=QUALITY_ADAPTIVE):
+        self.budget = 1.0 / target_fps
+        self.levels = levels
+        self.enabled = enabled
+        self.level = 0
+        self.avg_frame = 0.0        # Moyenne glissante exponentielle (s)
+        self._slow_frames = 0
+        self._fast_frames = 0
+
+    def update(self, frame_time):
+        """Ajoute une mesure ; retourne True si le niveau a changé."""
+        if not self.enabled:
+            return False
+        self.avg_frame = frame_time if self.avg_frame == 0 else 0.9 * self.avg_frame + 0.1 * frame_time
+
+        if self.avg_frame > self.budget:
+            self._slow_frames += 1
+            self._fast_frames = 0
+        elif self.avg_frame < self.budget * QUALITY_HEADROOM:
+            self._fast_frames += 1
+            self._slow_frames = 0
+        else:
+            self._slow_frames = self._fast_frames = 0
+
+        if self._slow_frames >= QUALITY_DOWNGRADE_FRAMES and self.level < len(self.levels) - 1:
+            return self.set_level(self.level + 1)
+        if self._fast_frames >= QUALITY_UPGRADE_FRAMES and self.level > 0:
+            return self.set_level(self.level - 1)
+        return False
+
+    def set_level(self, level):
+        level = max(0, min(len(self.levels) - 1, level))
+        changed = level != self.level
+        self.level = level
+        self._slow_frames = self._fast_frames = 0
+        return changed
+
+    def toggle(self):
+        """Active / coupe le mode adaptatif ; coupé, on revient à la qualité maximale."""
+        self.enabled = not self.enabled
+        self.set_level(0)
+        self.avg_frame = 0.0
+
+    def apply(self, fourier):
+        """Applique le niveau courant à une simulation."""
+        max_circles, substep_scale, lod_bias, overlay_alpha = self.levels[self.level]
+        fourier.max_circles = MAX_DRAWN_CIRCLES if max_circles is None else max_circles
+        fourier.substep_scale = substep_scale
+        fourier.overlay_alpha = overlay_alpha
+        fourier.batcher.set_lod_bias(lod_bias)
+
+    def label(self):
+        mode = "auto" if self.enabled else "max"
+        return f"{len(self.levels) - self.level}/{len(self.levels)} ({mode})"
@@ -0,0 +1,264 @@
+import os
+os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")
+
+import sys
+import math
+import threading
+import pygame
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from settings import *
+from utils import draw_grid, get_font, TextCache, pool_context
+from loader_ui import load_shape, MiniInfinityLoader
+from fourier_engine import FourierEpicycles
+from profiler import PROFILER
+
+# ====== LAYOUT ======
+def grid_layout(n, extent=300):
+    """
+    Décalages (unités monde) et échelles pour ranger n formes en grille dans la fenêtre.
+    `extent` : demi-taille d'une forme normalisée par load_svg.
+    """
+    cols = math.ceil(math.sqrt(n))
+    rows = math.ceil(n / cols)
+    cell = min(WINDOW_SIZE[0] / cols, WINDOW_SIZE[1] / rows)
+    offsets = []
+    for i in range(n):
+        r, c = divmod(i, cols)
+        offsets.append(complex((c - (cols - 1) / 2) * cell, (r - (rows - 1) / 2) * cell))
+    return offsets, [cell / (2 * extent) * SCENE_FILL] * n
+
+# ====== SCENE LOADER ======
+class SceneLoader(threading.Thread):
+    """
+    Charge plusieurs SVG en parallèle (un processus par fichier, sans pool imbriqué)
+    sans geler l'interface. data : liste de (points, longueur, coefficients) dans l'ordre des fichiers.
+    """
+    def __init__(self, filenames, n_coeffs, use_cache=COEFF_CACHE_ENABLED, workers=SCENE_WORKERS):
+        super().__init__()
+        self.filenames = filenames
+        self.n_coeffs = n_coeffs
+        self.use_cache = use_cache
+        self.workers = workers if workers >= 0 else (os.cpu_count() or 1)
+        self.progress = 0.0
+        self.done = False
+        self.data = None
+
+    def run(self):
+        results = [None] * len(self.filenames)
+        if self.workers > 1 and len(self.filenames) > 1:
+            with ProcessPoolExecutor(max_workers=min(self.workers, len(self.filenames)),
+                                     mp_context=pool_context()) as pool:
+                futures = {
+                    pool.submit(load_shape, f, self.n_coeffs, self.use_cache, svg_workers=0, segmented=False): i
+                    for i, f in enumerate(self.filenames)
+                }
+                for n_done, future in enumerate(as_completed(futures), 1):
+                    results[futures[future]] = future.result()[0]
+                    self.progress = n_done / len(self.filenames)
+        else:
+            for i, f in enumerate(self.filenames):
+                results[i] = load_shape(f, self.n_coeffs, self.use_cache, segmented=False)[0]
+                self.progress = (i + 1) / len(self.filenames)
+        self.data = results
+        self.done = True
+
+# ====== SCENE ======
+class FourierScene:
+    """
+    Plusieurs dessins animés ensemble. Les coefficients sont empilés dans des tableaux
+    (formes × K) complétés par des zéros : une seule évaluation vectorisée par image,
+    pour toutes les formes et tous les sous-pas. Chaque forme garde son FourierEpicycles
+    (horloge, tracé, dessin) dans son repère local ; décalage et échelle sont appliqués
+    au dessin via une caméra équivalente.
+    """
+    def __init__(self, shapes_data, offsets=None, scales=None):
+        self.shapes = [FourierEpicycles(points, total_length, coeffs) for points, total_length, coeffs in shapes_data]
+        default_offsets, default_scales = grid_layout(len(self.shapes))
+        self.offsets = np.array(default_offsets if offsets is None else offsets, dtype=np.complex128)
+        self.scales = np.array(default_scales if scales is None else scales, dtype=np.float64)
+        self.show_vectors = True
+        self.overlay = pygame.Surface(WINDOW_SIZE, pygame.SRCALPHA)
+
+        # Couche commune des lots terminés de toutes les formes (même principe que TrailBatcher.draw)
+        self.cache_surface = None
+        self._cache_key = None
+        self._cached_batches = [0] * len(self.shapes)
+        self._last_key = None
+        self.stack_coeffs()
+
+    def stack_coeffs(self):
+        """(Re)construit les tableaux empilés ; à rappeler après set_coeffs / set_active_count d'une forme."""
+        K = max((len(shape.freqs) for shape in self.shapes), default=0)
+        self.freqs = np.zeros((len(self.shapes), K))
+        self.coeff_vec = np.zeros((len(self.shapes), K), dtype=np.complex128)  # Zéros : aucune contribution
+        self.lengths = [len(shape.freqs) for shape in self.shapes]
+        for i, shape in enumerate(self.shapes):
+            self.freqs[i, :self.lengths[i]] = shape.freqs
+            self.coeff_vec[i, :self.lengths[i]] = shape.coeff_vec
+
+    def reset(self):
+        for shape in self.shapes:
+            shape.batcher.reset()
+
+    def step_frame(self, visual_speed):
+        """Avance toutes les formes d'une image : instants par forme, positions en un seul calcul (S × pas × K)."""
+        if not self.shapes:
+            return
+        steps_list, dts, wraps = [], [], []
+        for shape in self.shapes:
+            if shape._trail_stale:
+                shape.rebuild_trail()
+            dt, steps = shape.frame_steps(visual_speed)
+            dts.append(dt)
+            steps_list.append(steps)
+        steps = max(steps_list)
+
+        # Même nombre de sous-pas pour toutes, durée d'image de chaque forme conservée
+        dts = np.array(dts) * np.array(steps_list) / steps
+        times = np.empty((len(self.shapes), steps))
+        for i, shape in enumerate(self.shapes):
+            times[i], w = shape.advance_times(dts[i], steps)
+            wraps.append(w)
+
+        # Rotations par récurrence : une exponentielle au premier sous-pas, puis un produit par pas
+        # (fréquences entières : le rebouclage t -> t - 1 ne change pas les phases)
+        rotating = np.empty((len(self.shapes), steps, self.freqs.shape[1]), dtype=np.complex128)
+        rotating[:, 0] = self.coeff_vec * np.exp(2j * np.pi * times[:, :1] * self.freqs)
+        step_rotation = np.exp(2j * np.pi * dts[:, None] * self.freqs)
+        for j in range(1, steps):
+            np.multiply(rotating[:, j - 1], step_rotation, out=rotating[:, j])
+        positions = rotating.sum(axis=2)
+
+        for i, shape in enumerate(self.shapes):
+            shape.consume_positions(times[i], wraps[i], positions[i], dts[i])
+
+    def shape_view(self, i, cam, zoom):
+        """Caméra et zoom équivalents pour dessiner la forme i dans son repère local."""
+        o, s = self.offsets[i], self.scales[i]
+        return (cam + np.array([o.real, o.imag])) / s, zoom * s
+
+    def chains(self):
+        """Extrémités des bras de toutes les formes (somme cumulée par ligne)."""
+        t = np.array([shape.time for shape in self.shapes])
+        chains = np.cumsum(self.coeff_vec * np.exp(2j * np.pi * t[:, None] * self.freqs), axis=1)
+        return [chains[i, :n] for i, n in enumerate(self.lengths)]
+
+    def _draw_trails(self, surf, cam, zoom, views):
+        key = (zoom, float(cam[0]), float(cam[1]))
+        stable = key == self._last_key
+        self._last_key = key
+        batchers = [shape.batcher for shape in self.shapes]
+
+        if not stable:
+            for batcher, (c, z) in zip(batchers, views):
+                batcher._draw_batch_range(surf, 0, batcher.n_batches, c, z)
+        else:
+            if self.cache_surface is None or self.cache_surface.get_size() != surf.get_size():
+                self.cache_surface = pygame.Surface(surf.get_size(), pygame.SRCALPHA)
+                self._cache_key = None
+            if key != self._cache_key or any(batcher.dirty for batcher in batchers):
+                self.cache_surface.fill((0, 0, 0, 0))
+                self._cached_batches = [0] * len(batchers)
+                self._cache_key = key
+                for batcher in batchers:
+                    batcher.dirty = False
+            for i, (batcher, (c, z)) in enumerate(zip(batchers, views)):
+                if self._cached_batches[i] < batcher.n_batches:
+                    batcher._draw_batch_range(self.cache_surface, self._cached_batches[i], batcher.n_batches, c, z)
+                    self._cached_batches[i] = batcher.n_batches
+            surf.blit(self.cache_surface, (0, 0))
+
+        for batcher, (c, z) in zip(batchers, views):
+            batcher.draw_active(surf, c, z)
+
+    def draw(self, surf, cam, zoom):
+        """Un seul calque alpha et une seule couche de tracé pour toute la scène."""
+        views = [self.shape_view(i, cam, zoom) for i in range(len(self.shapes))]
+        chains = self.chains()
+
+        with PROFILER.timer("épicycles"):
+            if self.show_vectors:
+                self.overlay.fill((0, 0, 0, 0))
+                for shape, (c, z), chain in zip(self.shapes, views, chains):
+                    shape.draw_vectors(self.overlay, c, z, chain)
+                surf.blit(self.overlay, (0, 0))
+        with PROFILER.timer("tracé"):
+            self._draw_trails(surf, cam, zoom, views)
+
+        for shape, (c, z), chain in zip(self.shapes, views, chains):
+            shape.draw_head(surf, c, z, chain[-1] if len(chain) else 0 + 0j)
+
+# ====== MAIN ======
+def main():
+    """Affiche plusieurs SVG animés ensemble : python scene.py a.svg b.svg ..."""
+    files = [a for a in sys.argv[1:] if not a.startswith("--")]
+    if not files:
+        print("Usage : python scene.py fichier1.svg fichier2.svg ... [--no-cache]")
+        return 1
+
+    pygame.init()
+    screen = pygame.display.set_mode(WINDOW_SIZE, pygame.DOUBLEBUF)
+    pygame.display.set_caption(f"Fourier - Scène ({len(files)} dessins)")
+    clock = pygame.time.Clock()
+    font = get_font("consolas", 16)
+    big_font = get_font("consolas", 20)
+    hud_texts = TextCache(font)
+
+    mini_loader = MiniInfinityLoader()
+    loader = SceneLoader(files, N_COEFFS, use_cache=COEFF_CACHE_ENABLED and "--no-cache" not in sys.argv)
+    loader.start()
+
+    scene = None
+    camera = np.array([0.0, 0.0])
+    zoom = 1.0
+    visual_speed = 2.0
+    running = True
+
+    while running:
+        for e in pygame.event.get():
+            if e.type == pygame.QUIT: running = False
+            if e.type == pygame.KEYDOWN:
+                if e.key == pygame.K_ESCAPE: running = False
+                if e.key == pygame.K_p: PROFILER.toggle_overlay()
+                if scene is not None:
+                    if e.key == pygame.K_r: scene.reset()
+                    if e.key == pygame.K_h: scene.show_vectors = not scene.show_vectors
+                    if e.key in (pygame.K_KP_PLUS, pygame.K_PLUS): zoom *= 1.1
+                    if e.key in (pygame.K_KP_MINUS, pygame.K_MINUS): zoom /= 1.1
+                    if e.key == pygame.K_UP: visual_speed = min(10, visual_speed + 0.5)
+                    if e.key == pygame.K_DOWN: visual_speed = max(0.5, visual_speed - 0.5)
+
+        screen.fill(BG_COLOR)
+        if scene is None:
+            mini_loader.update()
+            mini_loader.draw(screen, big_font, loader.progress)
+            if loader.done:
+                scene = FourierScene(loader.data)
+        else:
+            with PROFILER.timer("physique"):
+                scene.step_frame(visual_speed)
+            with PROFILER.timer("grille"):
+                draw_grid(screen, camera, zoom)
+            scene.draw(screen, camera, zoom)
+
+            infos = [
+                f"FPS: {int(clock.get_fps())}",
+                f"Dessins : {len(scene.shapes)}",
+                f"Vitesse : {visual_speed:.2f}x  Zoom : {zoom:.2f}x",
+                "[H] Vecteurs  [R] Reset  [+/-] Zoom  [Haut/Bas] Vitesse  [P] Profilage",
+            ]
+            for i, info in enumerate(infos):
+                screen.blit(hud_texts.render(i, info, (200, 200, 200)), (10, 10 + i * 20))
+            PROFILER.draw(screen, font)
+
+        pygame.display.flip()
+        clock.tick(TARGET_FPS)
+
+    if loader.is_alive():
+        loader.join(timeout=1.0)
+    pygame.quit()
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,3 +1,5 @@
+import os
+
 # ====== CONSTANTS & CONFIG ======
 # Ce fichier contient toutes les variables globales de configuration.
 
@@ -8,13 +10,92 @@ CENTER_SCREEN = (WINDOW_SIZE[0] // 2, WINDOW_SIZE[1] // 2)
 # Couleurs (Thème sombre)
 BG_COLOR = (5, 5, 10)
 GRID_COLOR = (20, 30, 70)
+GRID_TILE_MAX_SPACING = 200  # Espacement (px) au-delà duquel la grille est dessinée ligne à ligne
 
 # Fichier par défaut (si aucun argument n'est donné)
 DEFAULT_INPUT_PATH = "images/dragon.svg" 
 
 # Précision de la simulation
 N_COEFFS = 400            # Nombre de cercles (épicycles).
+N_COEFFS_MAX = 1000       # Spectre calculé une fois (fréquences ±n) ; [Gauche/Droite] règle le nombre actif
+COEFF_COUNT_STEP = 1.25   # Facteur appliqué au nombre d'épicycles actifs par appui
+TRAIL_REBUILD_CHUNK = 4096  # Points évalués par bloc lors de la reconstruction du tracé
 
 # Paramètres de dessin
 THRESHOLD_VELOCITY_FACTOR = 3.0 # Seuil pour détecter un "saut" (lever le stylo)
-MIN_DRAW_DIST = 0.5             # Distance min pour ajouter un point (optimisation)
\ No newline at end of file
+MIN_DRAW_DIST = 0.5             # Distance min pour ajouter un point (optimisation)
+CAMERA_SNAP_PX = 0.01           # Écart (pixels) sous lequel la caméra qui revient au centre s'y fixe
+
+# Calcul des coefficients
+COEFF_BACKEND = "fft"           # "fft" (rapide) ou "dft" (boucle directe, référence)
+COEFF_CHECK = False             # Affiche l'écart max entre le backend choisi et la DFT directe
+
+# Raffinement progressif : l'animation démarre avec les basses fréquences, puis bascule à chaud
+PROGRESSIVE_COEFFS = True
+PROGRESSIVE_STAGES = (8, 32, 128)   # Nombres de fréquences (±n) publiés avant le jeu complet
+
+# Cache disque des coefficients
+COEFF_CACHE_ENABLED = True
+COEFF_CACHE_DIR = os.path.join(os.path.expanduser("~"), ".cache", "fourier_epicycles")
+COEFF_CACHE_MAX_MB = 200        # Taille max du cache (éviction LRU au-delà)
+
+# Tri des chemins (trajet du "stylo")
+SORT_ALLOW_REVERSE = True       # Autorise à parcourir un chemin à l'envers si c'est plus court
+SORT_TWO_OPT_BUDGET = 10_000_000  # Paires évaluées au plus par l'amélioration 2-opt (0 = désactivée)
+
+# Échantillonnage des chemins SVG
+SAMPLING_DENSITY = 1.0          # Points par unité de longueur SVG
+SAMPLING_ADAPTIVE = False       # Densité adaptée à la courbure (plus de points dans les virages)
+SAMPLING_ANGLE_STEP = 0.05      # Mode adaptatif : 1 point supplémentaire par tranche d'angle (radians)
+
+# Lecture des SVG volumineux
+SVG_STREAMING_MIN_MB = 20       # Au-delà de cette taille, lecture XML incrémentale (0 = toujours)
+
+# Parsing / échantillonnage multi-processus
+SVG_WORKERS = -1                # Nombre de processus (0 = dans le thread du loader, -1 = tous les cœurs)
+SVG_WORKERS_MIN_PATHS = 500     # En dessous, le coût de démarrage du pool n'est pas rentable
+SVG_WORKER_CHUNK = 256          # Nombre de chemins envoyés à chaque tâche
+
+# Rendu des épicycles
+MAX_DRAWN_CIRCLES = None        # Nombre max de cercles dessinés (None = tous), n'affecte pas le tracé
+
+# Table de trajectoire précalculée (lecture indexée au lieu de la somme de Fourier)
+TRAJECTORY_TABLE = False        # Active la table (une IFFT au chargement)
+TRAJECTORY_OVERSAMPLE = 4       # Points de table par point de tracé estimé
+TRAJECTORY_TABLE_MAX_MB = 64    # Au-delà, retour à l'évaluation directe
+
+# Niveaux de détail du tracé (dézoom)
+LOD_TOLERANCES = (2.0, 4.0, 8.0, 16.0)  # Tailles de grille de décimation (unités monde)
+LOD_PIXEL_TOLERANCE = 1.0               # Erreur max tolérée à l'écran (pixels)
+
+# Instrumentation (overlay [P])
+PROFILER_ENABLED = False        # Chronomètres actifs dès le démarrage
+PROFILER_WINDOW = 240           # Nombre de mesures gardées par étape (percentiles glissants)
+PROFILER_TRACE_MAX_EVENTS = 200000
+
+# Qualité adaptative (touche [Q]) : tient TARGET_FPS en dégradant le rendu si besoin
+TARGET_FPS = 60
+QUALITY_ADAPTIVE = True         # Actif au démarrage
+# Niveaux, du meilleur au plus léger : (cercles dessinés max, facteur de sous-pas, biais LOD, calque alpha)
+QUALITY_LEVELS = (
+    (None, 1.0, 0, True),
+    (200, 1.0, 0, True),
+    (100, 0.75, 1, True),
+    (50, 0.5, 1, False),
+    (20, 0.5, 2, False),
+    (0, 0.34, 3, False),
+)
+QUALITY_DOWNGRADE_FRAMES = 20   # Images consécutives trop lentes avant de baisser d'un niveau
+QUALITY_UPGRADE_FRAMES = 120    # Images consécutives avec de la marge avant de remonter
+QUALITY_HEADROOM = 0.6          # Remonte si le temps de calcul < HEADROOM × budget
+
+# Scène multi-dessins (scene.py)
+SCENE_WORKERS = -1              # Processus de chargement (0 = dans le thread du loader, -1 = tous les cœurs)
+SCENE_FILL = 0.9                # Part de chaque case de la grille occupée par une forme
+
+# Transformée par groupes de traits (moins de coefficients pour les SVG à plusieurs traits)
+SEGMENTED_TRANSFORM = False
+SEGMENT_MAX_GROUPS = 32         # Nombre max de groupes (coupures aux plus grands sauts)
+SEGMENT_JUMP_FACTOR = 8.0       # Saut = écart entre points > facteur × écart médian
+SEGMENT_MIN_POINTS = 16         # Taille min d'un groupe (points)
+SEGMENT_MIN_COEFFS = 5          # Épicycles min par groupe quand le budget le permet
@@ -1,7 +1,13 @@
+import os
 import numpy as np
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory, resource_tracker
 from xml.dom import minidom
-from svg.path import parse_path
-import time
+from xml.etree import ElementTree
+from svg.path import parse_path, Linear, CubicBezier, QuadraticBezier, Arc, Move
+from settings import *
+from profiler import PROFILER
+from utils import pool_context
 
 # ====== SVG HANDLER ======
 class SVGHandler:
@@ -16,109 +22,549 @@ class SVGHandler:
         return x + 1j * y, 1000.0
 
     @staticmethod
-    def sort_paths(paths_list, progress_callback=None):
+    def sort_paths(paths_list, progress_callback=None, allow_reverse=SORT_ALLOW_REVERSE,
+                   two_opt_budget=SORT_TWO_OPT_BUDGET):
         """
-        Algorithme glouton (Greedy) pour trier les chemins.
-        Relie la fin d'un tracé au début du tracé le plus proche.
+        Ordonne les chemins pour minimiser les sauts du "stylo".
+        Plus proche voisin glouton (index spatial par grille sur les extrémités),
+        puis amélioration 2-opt optionnelle, bornée en nombre de paires évaluées (déterministe).
+        Un chemin peut être parcouru à l'envers si allow_reverse est actif.
         """
         if not paths_list: return []
-        
-        count = len(paths_list)
-        sorted_paths = [paths_list.pop(0)]
-        total_initial = count + 1
-        
-        while paths_list:
-            last_point = sorted_paths[-1][-1]
-            best_idx = 0
-            min_dist = float('inf')
-            
-            # Recherche du voisin le plus proche
-            for i, p in enumerate(paths_list):
-                dist = abs(p[0] - last_point)
-                if dist < min_dist:
-                    min_dist = dist
-                    best_idx = i
-            
-            sorted_paths.append(paths_list.pop(best_idx))
 
-            # === OPTIMISATION LAG ===
-            # Petite pause pour laisser le CPU respirer
-            if len(sorted_paths) % 20 == 0:
-                time.sleep(0.0001)
-            
-            # Mise à jour de la barre de progression
-            if progress_callback and len(sorted_paths) % 5 == 0:
-                base_pct = 0.9
-                local_pct = len(sorted_paths) / total_initial
-                progress_callback(base_pct + (local_pct * 0.1))
-        
-        return sorted_paths
+        starts = np.array([p[0] for p in paths_list], dtype=np.complex128)
+        ends = np.array([p[-1] for p in paths_list], dtype=np.complex128)
+
+        def nn_progress(p):
+            if progress_callback: progress_callback(0.9 + p * 0.08)
+
+        order, flipped = nearest_neighbour_order(starts, ends, allow_reverse, nn_progress)
+        if allow_reverse and two_opt_budget > 0:
+            order, flipped = two_opt(order, flipped, starts, ends, two_opt_budget)
+        if progress_callback: progress_callback(1.0)
+
+        return [paths_list[i][::-1] if f else paths_list[i] for i, f in zip(order, flipped)]
 
     @staticmethod
-    def load_svg(filepath, progress_callback=None):
-        """Charge le fichier, extrait les chemins et les convertit en points complexes."""
+    def load_svg(filepath, progress_callback=None, strict=False, workers=None, return_meta=False,
+                 two_opt_budget=SORT_TWO_OPT_BUDGET):
+        """
+        Charge le fichier, extrait les chemins et les convertit en points complexes.
+        En cas d'échec, retourne un coeur, sauf si strict=True (l'erreur est alors levée).
+        workers remplace SVG_WORKERS (0 = pas de pool), two_opt_budget remplace SORT_TWO_OPT_BUDGET.
+        return_meta=True ajoute la normalisation appliquée : {"center": [x, y], "scale": s}
+        (point normalisé = (point SVG - center) * scale), ou None pour le coeur de repli.
+        """
+        points, total_length, meta = SVGHandler._load_svg(filepath, progress_callback, strict, workers, two_opt_budget)
+        return (points, total_length, meta) if return_meta else (points, total_length)
+
+    @staticmethod
+    def _load_svg(filepath, progress_callback, strict, workers, two_opt_budget):
         try:
             # Feedback immédiat
             if progress_callback: progress_callback(0.1) 
             
-            doc = minidom.parse(filepath)
-            path_strings = [p.getAttribute('d') for p in doc.getElementsByTagName('path')]
-            doc.unlink()
+            streaming = os.path.getsize(filepath) >= SVG_STREAMING_MIN_MB * 1024 * 1024
+            if streaming:
+                # Lecture incrémentale : la progression suit les octets lus
+                def bytes_progress(p):
+                    if progress_callback: progress_callback(0.1 + p * 0.8)
+                path_strings = iter_path_strings(filepath, bytes_progress)
+                total_paths = None
+            else:
+                with PROFILER.timer("parsing"):
+                    doc = minidom.parse(filepath)
+                    path_strings = [p.getAttribute('d') for p in doc.getElementsByTagName('path')]
+                    doc.unlink()
+                total_paths = len(path_strings)
             
-            if not path_strings: 
-                return SVGHandler.generate_heart()
-
-            raw_paths = []
-            total_length = 0.0
-            total_paths = len(path_strings)
-
-            # Étape 1 : Parsing & Sampling
-            for idx, d in enumerate(path_strings):
-                path = parse_path(d)
-                length = path.length()
-                
-                # Anti-Freeze
-                if idx % 5 == 0:
-                    time.sleep(0.0001)
-
-                if length == 0: continue
-                total_length += length
-                
-                n_points = int(length) + 10 
-                pts = []
-                for i in range(n_points):
-                    p = path.point(i / n_points)
-                    pts.append(complex(p.real, p.imag))
-                
-                if pts:
-                    raw_paths.append(pts)
-                
-                if progress_callback and idx % 2 == 0:
-                    current_pct = 0.1 + (idx / total_paths) * 0.8
-                    progress_callback(current_pct)
-
-            # Étape 2 : Tri intelligent
-            sorted_paths = SVGHandler.sort_paths(raw_paths, progress_callback)
-            
-            # Aplatir la liste
-            final_points = []
-            for p_list in sorted_paths:
-                final_points.extend(p_list)
-            
-            pts = np.array(final_points)
+                if not path_strings: 
+                    if strict: raise ValueError("aucun <path> dans le fichier")
+                    return (*SVGHandler.generate_heart(), None)
+
+            # Étape 1 : Parsing & Sampling (au fil de la lecture en mode streaming)
+            workers = SVG_WORKERS if workers is None else workers
+            workers = workers if workers >= 0 else (os.cpu_count() or 1)
+            parallel = workers > 1 and (streaming or total_paths >= SVG_WORKERS_MIN_PATHS)
+            # En mode streaming, le parsing XML est inclus dans cette étape
+            blocks = []
+            raw_paths = sorted_paths = None
+            try:
+                with PROFILER.timer("échantillonnage"):
+                    if parallel:
+                        raw_paths, total_length, n_strings, blocks = sample_path_strings_parallel(
+                            path_strings, workers, progress_callback, total_paths)
+                    else:
+                        raw_paths, total_length, n_strings = sample_path_strings(
+                            path_strings, progress_callback, total_paths)
+
+                if n_strings == 0:
+                    if strict: raise ValueError("aucun <path> dans le fichier")
+                    return (*SVGHandler.generate_heart(), None)
+
+                if not raw_paths:
+                    raise ValueError("tous les chemins sont de longueur nulle")
+
+                # Étape 2 : Tri intelligent
+                with PROFILER.timer("tri"):
+                    sorted_paths = SVGHandler.sort_paths(raw_paths, progress_callback, two_opt_budget=two_opt_budget)
+
+                # Un seul tableau contigu complex128
+                pts = np.concatenate(sorted_paths)
+            finally:
+                # Points copiés, ou échec : les vues sont lâchées puis les blocs partagés supprimés
+                raw_paths = sorted_paths = None
+                release_blocks(blocks)
             
             # Centrer et Normaliser
+            center, scale = 0j, 1.0
             if len(pts) > 0:
-                pts -= np.mean(pts)
+                center = np.mean(pts)
+                pts -= center
                 m = np.max(np.abs(pts))
-                if m > 0: pts = pts / m * 300
+                if m > 0:
+                    scale = 300 / m
+                    pts = pts / m * 300
+            meta = {"center": [float(center.real), float(center.imag)], "scale": float(scale)}
             
             diffs = np.abs(np.diff(pts))
             estimated_math_length = np.sum(diffs)
             
             if progress_callback: progress_callback(1.0)
-            return pts, estimated_math_length
+            return pts, estimated_math_length, meta
 
         except Exception as e:
+            if strict: raise
             print(f"Erreur chargement SVG: {e}")
-            return SVGHandler.generate_heart()
\ No newline at end of file
+            return (*SVGHandler.generate_heart(), None)
+
+# ====== STREAMING XML ======
+class _CountingReader:
+    """Enveloppe de fichier qui compte les octets lus (pour la progression)."""
+    def __init__(self, f, total, progress_callback):
+        self.f = f
+        self.total = max(total, 1)
+        self.read_bytes = 0
+        self.progress_callback = progress_callback
+
+    def read(self, size=-1):
+        data = self.f.read(size)
+        self.read_bytes += len(data)
+        if self.progress_callback:
+            self.progress_callback(min(1.0, self.read_bytes / self.total))
+        return data
+
+def iter_path_strings(filepath, progress_callback=None, chunk_size=1 << 16):
+    """
+    Générateur des attributs 'd' des <path>, au fil de la lecture (iterparse).
+    Les éléments sont libérés dès qu'ils sont traités : la mémoire reste bornée.
+    progress_callback reçoit la fraction d'octets lus.
+    """
+    total = os.path.getsize(filepath)
+    with open(filepath, "rb") as f:
+        reader = _CountingReader(f, total, progress_callback)
+        parser = ElementTree.XMLPullParser(events=("start", "end"))
+        open_elems = []  # Éléments ouverts, de la racine à l'élément courant
+        for chunk in iter(lambda: reader.read(chunk_size), b""):
+            parser.feed(chunk)
+            for event, elem in parser.read_events():
+                if event == "start":
+                    open_elems.append(elem)
+                    continue
+                open_elems.pop()
+                if elem.tag.rsplit('}', 1)[-1] == 'path':
+                    yield elem.get('d', '')
+                    elem.clear()
+                # Détache chaque élément terminé de son parent, à toute profondeur (chemins dans des <g>) :
+                # les frères précédents étant déjà retirés, c'est le seul enfant du parent
+                if open_elems:
+                    open_elems[-1].remove(elem)
+        parser.close()
+
+# ====== INGESTION ======
+def sample_path_strings(path_strings, progress_callback=None, total_paths=None):
+    """
+    Parse et échantillonne les chemins dans le thread courant.
+    Retourne (liste de tableaux de points, longueur totale, nombre de chaînes lues).
+    """
+    raw_paths = []
+    total_length = 0.0
+    n_strings = 0
+
+    for idx, d in enumerate(path_strings):
+        n_strings += 1
+        path = parse_path(d)
+        length = path.length()
+        if length == 0: continue
+        total_length += length
+        
+        pts = sample_path(path, length)
+        if len(pts):
+            raw_paths.append(pts)
+        
+        if progress_callback and total_paths and idx % 2 == 0:
+            current_pct = 0.1 + (idx / total_paths) * 0.8
+            progress_callback(current_pct)
+
+    return raw_paths, total_length, n_strings
+
+def _create_shared_block(nbytes):
+    """Bloc de mémoire partagée dont le processus parent prendra la responsabilité."""
+    try:
+        return shared_memory.SharedMemory(create=True, size=nbytes, track=False)
+    except TypeError:
+        # Python < 3.13 : pas d'option track, on se désinscrit du resource tracker du worker
+        shm = shared_memory.SharedMemory(create=True, size=nbytes)
+        resource_tracker.unregister(shm._name, "shared_memory")
+        return shm
+
+def _sample_chunk(path_strings):
+    """
+    Tâche worker : parse et échantillonne un lot de chemins.
+    Les points sont écrits bout à bout dans un bloc de mémoire partagée,
+    seuls le nom du bloc et les tailles transitent par pickle.
+    """
+    arrays, total_length = [], 0.0
+    for d in path_strings:
+        path = parse_path(d)
+        length = path.length()
+        if length == 0: continue
+        total_length += length
+        pts = sample_path(path, length)
+        if len(pts):
+            arrays.append(pts)
+
+    counts = [len(a) for a in arrays]
+    if not arrays:
+        return None, counts, total_length
+    shm = _create_shared_block(sum(counts) * np.dtype(np.complex128).itemsize)
+    out = np.ndarray(sum(counts), dtype=np.complex128, buffer=shm.buf)
+    np.concatenate(arrays, out=out)
+    name = shm.name
+    del out
+    shm.close()
+    return name, counts, total_length
+
+def _chunks(iterable, size):
+    chunk = []
+    for item in iterable:
+        chunk.append(item)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+def sample_path_strings_parallel(path_strings, workers, progress_callback=None, total_paths=None):
+    """
+    Même résultat que sample_path_strings, réparti sur un pool de processus.
+    Les lots sont soumis au fil de la lecture et récupérés dans l'ordre d'origine.
+    Les chemins renvoyés sont des vues sur les blocs partagés (sans copie) :
+    appeler release_blocks(blocks) une fois les points copiés.
+    En cas d'échec, tous les blocs déjà créés sont supprimés avant de propager l'erreur.
+    """
+    raw_paths, blocks = [], []
+    total_length, n_strings = 0.0, 0
+
+    with ProcessPoolExecutor(max_workers=workers, mp_context=pool_context()) as pool:
+        futures = []
+        consumed = 0
+        try:
+            for chunk in _chunks(path_strings, SVG_WORKER_CHUNK):
+                n_strings += len(chunk)
+                futures.append(pool.submit(_sample_chunk, chunk))
+
+            for i, future in enumerate(futures):
+                name, counts, length = future.result()
+                consumed = i + 1
+                total_length += length
+                if progress_callback and total_paths:
+                    progress_callback(0.1 + ((i + 1) / len(futures)) * 0.8)
+                if name is None: continue
+
+                shm = shared_memory.SharedMemory(name=name)
+                blocks.append(shm)
+                block = np.ndarray(sum(counts), dtype=np.complex128, buffer=shm.buf)
+                offsets = np.cumsum([0] + counts)
+                raw_paths.extend(block[offsets[j]:offsets[j + 1]] for j in range(len(counts)))
+        except BaseException:
+            raw_paths = None
+            release_blocks(blocks)
+            _discard_futures(futures[consumed:])
+            raise
+
+    return raw_paths, total_length, n_strings, blocks
+
+def _discard_futures(futures):
+    """Annule les lots en attente et supprime les blocs des lots terminés mais non lus."""
+    for future in futures:
+        future.cancel()
+    for future in futures:
+        if future.cancelled(): continue
+        try:
+            name = future.result()[0]
+        except Exception:
+            continue
+        if name is not None:
+            release_blocks([shared_memory.SharedMemory(name=name)])
+
+def release_blocks(blocks):
+    """Ferme et supprime les blocs de mémoire partagée créés par les workers."""
+    for shm in blocks:
+        try:
+            shm.close()
+        except BufferError:
+            pass  # Vues encore référencées (chemin d'erreur) : la projection disparaît avec elles
+        shm.unlink()
+
+# ====== PATH SAMPLING ======
+def eval_segment(seg, t):
+    """Évalue un segment svg.path sur un tableau de paramètres t (forme fermée NumPy)."""
+    if isinstance(seg, CubicBezier):
+        mt = 1 - t
+        return (mt**3 * seg.start + 3 * mt**2 * t * seg.control1
+                + 3 * mt * t**2 * seg.control2 + t**3 * seg.end)
+    if isinstance(seg, QuadraticBezier):
+        mt = 1 - t
+        return mt**2 * seg.start + 2 * mt * t * seg.control + t**2 * seg.end
+    if isinstance(seg, Arc):
+        if seg.start == seg.end:
+            return np.full(len(t), seg.start, dtype=np.complex128)
+        if seg.radius.real == 0 or seg.radius.imag == 0:
+            return seg.start + (seg.end - seg.start) * t
+        angle = np.radians(seg.theta + seg.delta * t)
+        cosr = np.cos(np.radians(seg.rotation))
+        sinr = np.sin(np.radians(seg.rotation))
+        radius = seg.radius * seg.radius_scale
+        cos_a, sin_a = np.cos(angle), np.sin(angle)
+        x = cosr * cos_a * radius.real - sinr * sin_a * radius.imag + seg.center.real
+        y = sinr * cos_a * radius.real + cosr * sin_a * radius.imag + seg.center.imag
+        return x + 1j * y
+    if isinstance(seg, Linear):
+        return seg.start + (seg.end - seg.start) * t
+    # Move (ou segment inconnu) : évaluation point par point
+    return np.array([seg.point(float(x)) for x in t], dtype=np.complex128)
+
+def segment_turning(seg):
+    """Estimation de l'angle total (radians) parcouru par la tangente d'un segment."""
+    if isinstance(seg, Arc):
+        if seg.start == seg.end or seg.radius.real == 0 or seg.radius.imag == 0:
+            return 0.0
+        return abs(np.radians(seg.delta))
+    if isinstance(seg, CubicBezier):
+        poly = [seg.start, seg.control1, seg.control2, seg.end]
+    elif isinstance(seg, QuadraticBezier):
+        poly = [seg.start, seg.control, seg.end]
+    else:
+        return 0.0
+    # Somme des angles entre les côtés successifs du polygone de contrôle
+    edges = [b - a for a, b in zip(poly, poly[1:]) if b != a]
+    return float(sum(abs(np.angle(e2 / e1)) for e1, e2 in zip(edges, edges[1:])))
+
+def sample_path(path, length=None, density=None, adaptive=None):
+    """
+    Échantillonne un chemin svg.path entier en un tableau complex128.
+    Mode uniforme : mêmes points que path.point(i / n) pour i < n (n = length*densité + 10),
+    mais chaque segment est évalué d'un coup sur un tableau de t.
+    Mode adaptatif : nombre de points par segment selon sa longueur et sa courbure.
+    """
+    density = SAMPLING_DENSITY if density is None else density
+    adaptive = SAMPLING_ADAPTIVE if adaptive is None else adaptive
+    length = path.length() if length is None else length
+    segments = list(path)
+    if not segments or length == 0:
+        return np.empty(0, dtype=np.complex128)
+
+    rel_lengths = np.array(path.lengths, dtype=np.float64)
+
+    if adaptive:
+        chunks = []
+        for seg, rel in zip(segments, rel_lengths):
+            if rel == 0: continue
+            n_seg = int(np.ceil(rel * length * density + segment_turning(seg) / SAMPLING_ANGLE_STEP))
+            n_seg = max(n_seg, 2)
+            chunks.append(eval_segment(seg, np.arange(n_seg) / n_seg))
+        return np.concatenate(chunks) if chunks else np.empty(0, dtype=np.complex128)
+
+    n_points = int(length * density) + 10
+    pos = np.arange(n_points) / n_points
+    fractions = np.cumsum(rel_lengths)
+    seg_idx = np.minimum(np.searchsorted(fractions, pos, side='right'), len(segments) - 1)
+    prev_frac = np.concatenate(([0.0], fractions[:-1]))
+    seg_len = fractions[seg_idx] - prev_frac[seg_idx]
+    with np.errstate(divide='ignore', invalid='ignore'):
+        seg_pos = np.where(seg_len > 0, (pos - prev_frac[seg_idx]) / seg_len, 0.0)
+
+    out = np.empty(n_points, dtype=np.complex128)
+    # Les positions sont croissantes : chaque segment couvre un bloc contigu
+    bounds = np.searchsorted(seg_idx, np.arange(len(segments) + 1))
+    for i, seg in enumerate(segments):
+        lo, hi = bounds[i], bounds[i + 1]
+        if lo < hi:
+            out[lo:hi] = eval_segment(seg, seg_pos[lo:hi])
+
+    # Cas particulier de svg.path pour pos == 0 (saute un Move initial)
+    first = segments[1] if isinstance(segments[0], Move) and len(segments) > 1 else segments[0]
+    out[0] = first.point(0.0)
+    return out
+
+# ====== PATH ORDERING ======
+class EndpointGrid:
+    """
+    Index spatial (grille uniforme) sur les extrémités des chemins.
+    Chaque extrémité porte l'indice de son chemin et un drapeau "fin".
+    """
+    def __init__(self, points, owners, is_end):
+        self.points = points
+        self.owners = owners
+        self.is_end = is_end
+        self.alive = np.ones(len(points), dtype=bool)
+        self.remaining = len(points)
+
+        lo = np.array([points.real.min(), points.imag.min()])
+        hi = np.array([points.real.max(), points.imag.max()])
+        span = max(hi[0] - lo[0], hi[1] - lo[1], 1e-9)
+        # Environ un point par cellule
+        self.cell = max(span / max(np.sqrt(len(points)), 1.0), 1e-9)
+        self.origin = lo
+        self.n_cells = (int((hi[0] - lo[0]) / self.cell) + 1, int((hi[1] - lo[1]) / self.cell) + 1)
+
+        cx, cy = self._cell_of(points.real, points.imag)
+        self.buckets = {}
+        for i, key in enumerate(zip(cx.tolist(), cy.tolist())):
+            self.buckets.setdefault(key, []).append(i)
+
+    def _cell_of(self, x, y):
+        cx = ((x - self.origin[0]) / self.cell).astype(np.int64)
+        cy = ((y - self.origin[1]) / self.cell).astype(np.int64)
+        return cx, cy
+
+    def remove(self, idx):
+        if not self.alive[idx]: return
+        self.alive[idx] = False
+        self.remaining -= 1
+        p = self.points[idx]
+        cx, cy = self._cell_of(np.array([p.real]), np.array([p.imag]))
+        self.buckets[(int(cx[0]), int(cy[0]))].remove(idx)
+
+    def nearest(self, q):
+        """Indice de l'extrémité vivante la plus proche de q (None si vide)."""
+        if self.remaining == 0: return None
+        qx, qy = self._cell_of(np.array([q.real]), np.array([q.imag]))
+        qx, qy = int(qx[0]), int(qy[0])
+
+        best_idx, best_dist = None, float('inf')
+        max_ring = max(self.n_cells) + abs(qx) + abs(qy)
+        r = 0
+        while r <= max_ring:
+            # Anneau trop grand par rapport aux points restants : recherche brute vectorisée
+            if 8 * r > 4 * self.remaining + 8:
+                alive = np.flatnonzero(self.alive)
+                d = np.abs(self.points[alive] - q)
+                i = int(np.argmin(d))
+                if d[i] < best_dist:
+                    best_idx, best_dist = int(alive[i]), float(d[i])
+                return best_idx
+
+            for key in self._ring(qx, qy, r):
+                bucket = self.buckets.get(key)
+                if not bucket: continue
+                if len(bucket) > 32:
+                    # Cellule dense (données groupées) : distance vectorisée
+                    ids = np.array(bucket)
+                    d = np.abs(self.points[ids] - q)
+                    i = int(np.argmin(d))
+                    if d[i] < best_dist:
+                        best_idx, best_dist = int(ids[i]), float(d[i])
+                    continue
+                for idx in bucket:
+                    d = abs(self.points[idx] - q)
+                    if d < best_dist:
+                        best_idx, best_dist = idx, d
+            # Les cellules de l'anneau suivant sont au moins à r * cell de q
+            if best_idx is not None and best_dist <= r * self.cell:
+                break
+            r += 1
+        return best_idx
+
+    @staticmethod
+    def _ring(cx, cy, r):
+        if r == 0:
+            yield (cx, cy)
+            return
+        for x in range(cx - r, cx + r + 1):
+            yield (x, cy - r)
+            yield (x, cy + r)
+        for y in range(cy - r + 1, cy + r):
+            yield (cx - r, y)
+            yield (cx + r, y)
+
+def nearest_neighbour_order(starts, ends, allow_reverse=True, progress_callback=None):
+    """
+    Ordre glouton : part du premier chemin et enchaîne vers l'extrémité libre la plus proche.
+    Retourne (ordre des indices, drapeaux "parcouru à l'envers").
+    """
+    count = len(starts)
+    if allow_reverse:
+        points = np.concatenate((starts, ends))
+        owners = np.concatenate((np.arange(count), np.arange(count)))
+        is_end = np.concatenate((np.zeros(count, bool), np.ones(count, bool)))
+    else:
+        points, owners, is_end = starts, np.arange(count), np.zeros(count, bool)
+    grid = EndpointGrid(points, owners, is_end)
+
+    def take(path_idx):
+        grid.remove(path_idx)
+        if allow_reverse: grid.remove(path_idx + count)
+
+    order, flipped = [0], [False]
+    take(0)
+    last_point = ends[0]
+    while len(order) < count:
+        idx = grid.nearest(last_point)
+        path_idx = int(owners[idx])
+        rev = bool(is_end[idx])
+        take(path_idx)
+        order.append(path_idx)
+        flipped.append(rev)
+        last_point = starts[path_idx] if rev else ends[path_idx]
+
+        if progress_callback and len(order) % 64 == 0:
+            progress_callback(len(order) / count)
+    return order, flipped
+
+def two_opt(order, flipped, starts, ends, max_pairs):
+    """
+    Amélioration 2-opt : inverse un bloc de chemins (et le sens de chacun)
+    quand cela raccourcit les sauts. S'arrête après max_pairs paires (i, j) évaluées
+    ou quand une passe complète n'améliore plus rien : même résultat quelle que soit la machine.
+    """
+    count = len(order)
+    if count < 3: return order, flipped
+    order = np.array(order)
+    flipped = np.array(flipped)
+    entry = np.where(flipped, ends[order], starts[order])
+    exit_ = np.where(flipped, starts[order], ends[order])
+
+    pairs = 0
+    improved = True
+    while improved and pairs < max_pairs:
+        improved = False
+        for i in range(1, count):
+            pairs += count - i
+            a, b = exit_[i - 1], entry[i]
+            c = exit_[i:]
+            d = np.append(entry[i + 1:], np.nan)  # Pas de chemin après le dernier
+            old = abs(a - b) + np.nan_to_num(np.abs(c - d))
+            new = np.abs(a - c) + np.nan_to_num(np.abs(b - d))
+            delta = new - old
+            j = int(np.argmin(delta))
+            if delta[j] < -1e-9:
+                j += i
+                order[i:j + 1] = order[i:j + 1][::-1].copy()
+                flipped[i:j + 1] = ~flipped[i:j + 1][::-1]
+                entry[i:j + 1], exit_[i:j + 1] = exit_[i:j + 1][::-1].copy(), entry[i:j + 1][::-1].copy()
+                improved = True
+            if pairs >= max_pairs:
+                break
+    return order.tolist(), flipped.tolist()
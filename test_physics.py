@@ -0,0 +1,48 @@
+import os
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")
+
+import numpy as np
+import pytest
+from fourier_engine import FourierEpicycles
+
+# ====== SHAPE ======
+def two_strokes(n=400):
+    """Deux cercles séparés : un saut de stylo à chaque tour, en plus du rebouclage."""
+    t = np.linspace(0, 2 * np.pi, n // 2, endpoint=False)
+    first = 80 * np.exp(1j * t) - 120
+    second = 50 * np.exp(1j * t) + 150 + 40j
+    return np.concatenate((first, second))
+
+def make_epicycles(points, total_length):
+    fourier = FourierEpicycles(points, total_length, FourierEpicycles.compute_coeffs_static(points, 40))
+    fourier.use_trajectory_table = False  # Même évaluation directe pour les deux chemins
+    return fourier
+
+# ====== BATCH VS PER-STEP ======
+@pytest.mark.parametrize("visual_speed", [0.5, 2.0, 7.0])
+def test_batch_matches_per_step(visual_speed):
+    points = two_strokes()
+    total_length = 300.0
+    single = make_epicycles(points, total_length)
+    batch = make_epicycles(points, total_length)
+
+    sub_dt, steps = single.frame_steps(visual_speed)
+    n_frames = int(1.3 / (sub_dt * steps)) + 1  # Au-delà d'un tour complet
+    wrapped = False
+    for _ in range(n_frames):
+        before = single.time
+        for _ in range(steps):
+            single.update_physics(sub_dt)
+        batch.update_physics_batch(sub_dt, steps)
+        wrapped |= single.time < before
+
+    assert wrapped
+    assert batch.time == single.time
+    a, b = single.batcher, batch.batcher
+    assert b.n_batches == a.n_batches
+    assert np.array_equal(b.batch_bounds[:b.n_batches], a.batch_bounds[:a.n_batches])
+    assert b.size == a.size
+    assert b.active_start == a.active_start
+    assert b.total_points_count == a.total_points_count
+    assert np.allclose(b.buffer[:b.size], a.buffer[:a.size], rtol=0, atol=1e-9)
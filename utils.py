@@ -1,4 +1,6 @@
 import colorsys
+import multiprocessing
+from functools import lru_cache
 import pygame
 from settings import *
 
@@ -7,18 +9,64 @@ def hsv2rgb(h, s, v):
     """Convertit une couleur HSV (Teinte, Saturation, Valeur) en RGB pour Pygame."""
     return tuple(round(i * 255) for i in colorsys.hsv_to_rgb(h, s, v))
 
+@lru_cache(maxsize=None)
+def get_font(name, size):
+    """Police partagée : SysFont (lent, parcourt les polices système) n'est créé qu'une fois par taille."""
+    return pygame.font.SysFont(name, size)
+
+def pool_context():
+    """
+    Contexte des pools de processus : forkserver (ou spawn) plutôt que fork,
+    le pool étant créé depuis un thread alors que ceux de SDL tournent.
+    """
+    methods = multiprocessing.get_all_start_methods()
+    return multiprocessing.get_context("forkserver" if "forkserver" in methods else "spawn")
+
+class TextCache:
+    """
+    Surfaces de texte par emplacement (ligne du HUD...) : le texte n'est rendu à nouveau
+    que si sa valeur ou sa couleur change depuis l'image précédente.
+    """
+    def __init__(self, font):
+        self.font = font
+        self._slots = {}
+
+    def render(self, slot, text, color):
+        entry = self._slots.get(slot)
+        if entry is None or entry[0] != (text, color):
+            entry = self._slots[slot] = ((text, color), self.font.render(text, True, color))
+        return entry[1]
+
+_GRID_KEY = (255, 0, 255)  # Couleur transparente de la tuile (différente de GRID_COLOR)
+
+def _draw_grid_lines(surf, offset_x, offset_y, spacing, size):
+    for x in range(offset_x, size[0], spacing):
+        pygame.draw.line(surf, GRID_COLOR, (x, 0), (x, size[1]), 1)
+    for y in range(offset_y, size[1], spacing):
+        pygame.draw.line(surf, GRID_COLOR, (0, y), (size[0], y), 1)
+
+@lru_cache(maxsize=2)
+def _grid_tile(spacing, size):
+    """Grille pré-rendue, plus grande que la fenêtre d'un pas : il suffit de la décaler."""
+    tile = pygame.Surface((size[0] + spacing, size[1] + spacing))
+    tile.fill(_GRID_KEY)
+    _draw_grid_lines(tile, 0, 0, spacing, tile.get_size())
+    tile.set_colorkey(_GRID_KEY, pygame.RLEACCEL)
+    return tile
+
 def draw_grid(surf, cam, zoom):
-    """Dessine une grille infinie en fond qui bouge avec la caméra."""
+    """Dessine une grille infinie en fond qui bouge avec la caméra (un seul blit de tuile)."""
     spacing = int(100 * zoom)
     if spacing < 20: spacing = 20 # Évite que la grille devienne un mur de pixels si on dézoome trop
     
     # Calcul du décalage pour donner l'illusion d'infinité
     offset_x = int(cam[0] * zoom + CENTER_SCREEN[0]) % spacing
     offset_y = int(cam[1] * zoom + CENTER_SCREEN[1]) % spacing
+
+    if spacing > GRID_TILE_MAX_SPACING:
+        # Fort zoom : quelques lignes seulement, une tuile coûterait plus de mémoire qu'elle ne fait gagner
+        _draw_grid_lines(surf, offset_x, offset_y, spacing, WINDOW_SIZE)
+        return
     
-    # Lignes verticales
-    for x in range(offset_x, WINDOW_SIZE[0], spacing):
-        pygame.draw.line(surf, GRID_COLOR, (x, 0), (x, WINDOW_SIZE[1]), 1)
-    # Lignes horizontales
-    for y in range(offset_y, WINDOW_SIZE[1], spacing):
-        pygame.draw.line(surf, GRID_COLOR, (0, y), (WINDOW_SIZE[0], y), 1)
\ No newline at end of file
+    # La première ligne de la tuile tombe juste hors écran, la suivante en offset
+    surf.blit(_grid_tile(spacing, WINDOW_SIZE), (offset_x - spacing, offset_y - spacing))